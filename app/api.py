@@ -111,26 +111,228 @@
 #     return recommendations
 
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import chromadb
-from bs4 import BeautifulSoup
-import requests
+from typing import TYPE_CHECKING, List, Literal, Optional
+import asyncio
+import gc
+import json
+import numpy as np
 from fastapi.middleware.cors import CORSMiddleware
-import cohere
 from dotenv import load_dotenv
 import os
+import time
+
+from app.cache import SingleFlight, TTLCache
+from app.filters import SearchFilters, build_where
+from app.insights import gather_insights, iter_insights
+from app.metrics import CallbackMetric, Histogram, render_metrics, request_timings, server_timing_header, stage
+from app.rerank import RERANK_CANDIDATES, RERANK_DEFAULT, load_reranker, rerank, rerank_cache, warm_up_reranker
+from app.rag import (
+    CHROMA_PATH, EMBEDDING_RUNTIME, SIMILAR_TOP_N, chunk_text, create_embedding_function,
+    numpy_index_path, read_index_pointer, versioned_collection_name
+)
+from app.search import BM25Index, ChromaBackend, NumpyBackend, SimilarIndex, merge_hits
+
+# chromadb, bs4 and httpx are imported by the code paths that use them: a
+# numpy-backend deployment never loads Chroma, plain-text queries never parse
+# HTML, and use_ai=False requests never touch Cohere (see app/insights.py).
+# `python -m benchmarks.bench_startup` keeps track of the import cost.
+if TYPE_CHECKING:
+    import httpx
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Cohere (free tier)
-try:
-    co = cohere.Client(os.getenv("COHERE_API_KEY"))
-except:
-    co = None
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+
+# "chroma" queries the persistent collection, "numpy" does exact search over
+# the matrix exported next to it by app/rag.py
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "chroma").lower()
+
+# Job-posting URLs: tight fetch timeout, and extracted text is reused for
+# JOB_CACHE_TTL seconds so re-submitted postings skip the fetch and parse
+JOB_FETCH_TIMEOUT = float(os.getenv("JOB_FETCH_TIMEOUT", "10"))
+job_text_cache = TTLCache(
+    maxsize=int(os.getenv("JOB_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("JOB_CACHE_TTL", "3600"))
+)
+http_state = {"client": None}
+
+# Repeated queries skip both the encode and the search. Embeddings depend only
+# on the text; rankings also on n_results and the index version.
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_CACHE_MAX_BYTES = int(float(os.getenv("QUERY_CACHE_MAX_MB", "64")) * 1024 * 1024)
+RESULT_FIELDS = ("ids", "metadatas", "documents", "distances")
+query_embedding_cache = TTLCache(
+    maxsize=int(os.getenv("QUERY_CACHE_SIZE", "4096")),
+    ttl=QUERY_CACHE_TTL,
+    max_bytes=QUERY_CACHE_MAX_BYTES // 2,
+    sizeof=lambda embedding: embedding.nbytes
+)
+query_result_cache = TTLCache(
+    maxsize=int(os.getenv("QUERY_CACHE_SIZE", "4096")),
+    ttl=QUERY_CACHE_TTL,
+    max_bytes=QUERY_CACHE_MAX_BYTES // 2,
+    sizeof=lambda row: len(json.dumps(row, default=str))
+)
+
+# "semantic" ranks by embedding distance only; "hybrid" fuses the top
+# HYBRID_CANDIDATES of the embedding and BM25 rankings with reciprocal-rank
+# fusion, so exact keywords ("Java 8", "OPQ") can lift an assessment
+SEARCH_MODE = os.getenv("SEARCH_MODE", "semantic").lower()
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Stage timings (fetch, embed, search, rerank, insights, serialize) are always
+# recorded for /metrics; SERVER_TIMING also returns the current request's in a
+# Server-Timing header, which browser dev tools display per request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time until the response body is fully sent, per route")
+
+def cache_samples(field: str):
+    caches = {
+        "query_embeddings": query_embedding_cache,
+        "query_results": query_result_cache,
+        "job_text": job_text_cache,
+        "rerank_scores": rerank_cache
+    }
+    return [({"cache": name}, cache.stats()[field]) for name, cache in caches.items()]
+
+CallbackMetric("cache_hits_total", "In-memory cache hits", "counter", lambda: cache_samples("hits"))
+CallbackMetric("cache_misses_total", "In-memory cache misses", "counter", lambda: cache_samples("misses"))
+CallbackMetric("cache_entries", "In-memory cache entries", "gauge", lambda: cache_samples("entries"))
+CallbackMetric(
+    "coalesced_requests_total", "Requests answered by joining an identical in-flight request", "counter",
+    lambda: [({}, recommend_flights.followers)]
+)
+
+# Identical /recommend requests that arrive while one is being computed wait
+# for its result instead of scraping, embedding, searching and calling Cohere
+# again, e.g. a room of recruiters submitting the same posting at once
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() in ("1", "true", "yes")
+recommend_flights = SingleFlight()
+
+# How often to check app/index_pointer.json for a newly built index version
+INDEX_POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", "10"))
+
+# Populated once at startup so requests never pay for model or index setup.
+# The backend is replaced wholesale when a new index version goes live.
+search_state = {
+    "embedding_function": None, "backend": None, "lexical_index": None, "similar_index": None,
+    "version": None, "chroma_client": None, "filterable": True
+}
+
+def load_embedding_function():
+    if search_state["embedding_function"] is None:
+        search_state["embedding_function"] = create_embedding_function()
+    return search_state["embedding_function"]
+
+def warm_up_models():
+    # Runs in every worker: the first encode starts the inference thread
+    # pools, which a forked process would not inherit in a usable state
+    load_embedding_function()(["warm up"])  # First encode pays for lazy torch init
+    if RERANK_DEFAULT:
+        warm_up_reranker()
+
+def preload():
+    """Load what workers can share before gunicorn forks them (see gunicorn.conf.py).
+
+    Model weights and the numpy index are then shared copy-on-write by every
+    worker instead of being loaded once per worker. The embedding matrix and
+    the similar-assessment table are memory-mapped files; the metadata table
+    and BM25 postings are ordinary Python objects, whose pages stay shared
+    only until a worker writes to them.
+    """
+    if EMBEDDING_RUNTIME == "onnx":
+        # An onnxruntime session starts its thread pools when it is created,
+        # so each worker opens its own (the int8 model is small)
+        print("⚠️ EMBEDDING_RUNTIME=onnx: the model is loaded per worker, after fork")
+    else:
+        load_embedding_function()
+        if RERANK_DEFAULT:
+            load_reranker()
+
+    if SEARCH_BACKEND != "numpy":
+        # A PersistentClient holds SQLite connections, which must not cross a fork
+        print(f"⚠️ SEARCH_BACKEND={SEARCH_BACKEND}: every worker opens its own index, use numpy to share one")
+    else:
+        try:
+            load_backend()
+        except (ValueError, FileNotFoundError):
+            print(f"⚠️ {SEARCH_BACKEND} index not found, run python -m app.rag to build it")
+
+    # Reference counting still dirties the pages of objects a worker touches,
+    # but frozen objects are skipped by the cyclic collector, which would
+    # otherwise write to every one of them on each full collection
+    gc.freeze()
+
+def open_backend(version):
+    if SEARCH_BACKEND == "numpy":
+        return NumpyBackend.load(numpy_index_path(version), version)
 
-app = FastAPI()
+    if search_state["chroma_client"] is None:
+        import chromadb
+        search_state["chroma_client"] = chromadb.PersistentClient(path=CHROMA_PATH)
+    return ChromaBackend(search_state["chroma_client"].get_collection(
+        versioned_collection_name(version),
+        embedding_function=load_embedding_function()
+    ), version)
+
+def load_backend():
+    # The new backend is fully opened before it replaces the old one, so
+    # in-flight requests keep using whichever version they started with
+    version = read_index_pointer()["active"]
+    if search_state["backend"] is None or version != search_state["version"]:
+        backend = open_backend(version)
+        # The numpy backend already holds the metadata table; the sidecar
+        # indexes reuse it rather than each loading another copy
+        shared = backend if isinstance(backend, NumpyBackend) else None
+        try:
+            lexical_index = BM25Index.load(numpy_index_path(version), version, shared and shared.records)
+        except FileNotFoundError:
+            lexical_index = None
+            print(f"⚠️ No BM25 index for version {version or 'legacy'}, hybrid search falls back to semantic")
+        try:
+            similar_index = SimilarIndex.load(numpy_index_path(version), version, shared)
+        except FileNotFoundError:
+            similar_index = None
+            print(f"⚠️ No similar-assessment index for version {version or 'legacy'}, rebuild it with python -m app.rag")
+        search_state["backend"], search_state["lexical_index"], search_state["version"] = backend, lexical_index, version
+        search_state["similar_index"] = similar_index
+        search_state["filterable"] = backend.filterable()
+        if not search_state["filterable"]:
+            print(f"⚠️ Index version {version or 'legacy'} has no typed metadata, filtered requests are refused until it is rebuilt with python -m app.rag")
+        query_result_cache.clear()  # Rankings from the old version are stale
+        print(f"✅ Serving {SEARCH_BACKEND} index version {version or 'legacy'} ({backend.count()} assessments)")
+    return search_state["backend"]
+
+async def watch_index_pointer():
+    while True:
+        await asyncio.sleep(INDEX_POLL_INTERVAL)
+        try:
+            await run_in_threadpool(load_backend)
+        except Exception as e:
+            print(f"⚠️ Index reload failed, still serving {search_state['version'] or 'legacy'}: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_models()
+    try:
+        load_backend()
+    except (ValueError, FileNotFoundError):
+        print(f"⚠️ {SEARCH_BACKEND} index not found, run python -m app.rag to build it")
+
+    watcher = asyncio.create_task(watch_index_pointer())
+    yield
+    watcher.cancel()
+    if http_state["client"] is not None:
+        await http_state["client"].aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -140,72 +342,262 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-chroma_client = chromadb.PersistentClient(path="app/chroma_db")
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    timings = {}
+    token = request_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+    elapsed = time.perf_counter() - start
+
+    # Route templates, not raw paths, keep the label set bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    if SERVER_TIMING:
+        # Headers go out first, so on /recommend/stream this covers the ranking only
+        response.headers["Server-Timing"] = server_timing_header({**timings, "total": elapsed})
+
+    # call_next hands every body over as a stream; the request is only
+    # observed once it has been sent in full, streamed insights included
+    body = response.body_iterator
+
+    async def observed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route)
+
+    response.body_iterator = observed_body()
+    return response
 
 class QueryRequest(BaseModel):
     text: str
     use_ai: bool = True
+    filters: Optional[SearchFilters] = None
+    mode: Optional[Literal["semantic", "hybrid"]] = None  # Defaults to SEARCH_MODE
+    rerank: Optional[bool] = None  # Defaults to RERANK
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+
+def get_http_client() -> "httpx.AsyncClient":
+    # One pooled client for every job-board fetch, closed on shutdown
+    if http_state["client"] is None:
+        import httpx
+        http_state["client"] = httpx.AsyncClient(
+            headers={"User-Agent": "Mozilla/5.0"},
+            timeout=JOB_FETCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    return http_state["client"]
+
+def extract_job_description(html: str) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    job_desc_div = soup.select_one("div.job-description, section.description")
+    return job_desc_div.get_text(" ", strip=True) if job_desc_div else ""
+
+async def scrape_job_description(url: str) -> str:
+    cached = job_text_cache.get(url)
+    if cached is not None:
+        return cached
 
-def scrape_job_description(url: str) -> str:
     try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=50)
-        soup = BeautifulSoup(response.text, "html.parser")
-        job_desc_div = soup.select_one("div.job-description, section.description")
-        return job_desc_div.get_text(" ", strip=True) if job_desc_div else ""
+        with stage("fetch"):
+            response = await get_http_client().get(url)
+            response.raise_for_status()
+            job_text = await run_in_threadpool(extract_job_description, response.text)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Scraping error: {str(e)}")
-    
-def normalize_score(score: float) -> float:
-    try:
-        return max(0.0, min(1.0, abs(float(score))))
-    except:
-        return 0.5
 
-def generate_cohere_insights(description: str) -> str:
-    if not co:
-        return "AI insights unavailable"
+    # A page without a recognised description may just be a temporary error
+    # or placeholder page, so only real text is kept for the next request
+    if job_text:
+        job_text_cache.set(url, job_text)
+    return job_text
     
+def normalize_score(distance: float) -> float:
+    # Distances are squared L2 between unit vectors (2 - 2 * cosine). The
+    # cosine, clamped to [0, 1], is reported instead so that `score` means
+    # "higher is better" whichever stage produced it: semantic, hybrid fusion
+    # or the cross-encoder (also when a rerank falls back on its budget)
     try:
-        prompt = f"""As an HR expert, analyze this assessment description and provide 3 concise insights:
-        
-        Description: {description[:300]}
-        
-        Format as:
-        1. Key skills measured
-        2. Ideal candidate level
-        3. Best use case"""
-        
-        response = co.generate(
-            model='command',
-            prompt=prompt,
-            max_tokens=50,
-            temperature=0.5
-        )
-        return response.generations[0].text
-    except Exception as e:
-        return "AI insights unavailable"
+        return max(0.0, min(1.0, 1.0 - float(distance) / 2))
+    except (TypeError, ValueError):
+        return 0.0
 
-@app.post("/recommend")
-async def recommend(request: QueryRequest):
+def get_backend():
+    # Version changes are picked up by watch_index_pointer; requests only load
+    # the index themselves if nothing could be loaded at startup
+    if search_state["backend"] is not None:
+        return search_state["backend"]
     try:
-        collection = chroma_client.get_collection("shl_assessments")
-    except ValueError:
+        return load_backend()
+    except (ValueError, FileNotFoundError):
         raise HTTPException(status_code=500, detail="Vector DB not initialized")
 
-    query_text = request.text
-    if query_text.startswith(("http://", "https://")):
-        query_text = scrape_job_description(query_text)
+def check_filters(filters: Optional[SearchFilters]):
+    # A legacy index would silently return no matches for any filter
+    if build_where(filters) is not None and not search_state["filterable"]:
+        raise HTTPException(
+            status_code=409,
+            detail="The index was built without filter metadata, rebuild it with python -m app.rag"
+        )
+
+def normalize_query(text: str) -> str:
+    # The MiniLM tokenizer is uncased and whitespace-insensitive, so this
+    # folding never changes the embedding
+    return " ".join(text.lower().split())
+
+def embed_queries(query_texts: List[str]) -> List[np.ndarray]:
+    """One (chunks x dim) matrix per text; long job postings span several chunks."""
+    keys = [normalize_query(text) for text in query_texts]
+    embeddings = [query_embedding_cache.get(key) for key in keys]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        # One batched encode for every chunk of every text not seen recently
+        chunks = [chunk_text(query_texts[i]) for i in missing]
+        with stage("embed"):
+            encoded = np.asarray(load_embedding_function()([chunk for texts in chunks for chunk in texts]), dtype=np.float32)
+        start = 0
+        for i, texts in zip(missing, chunks):
+            embeddings[i] = encoded[start:start + len(texts)]
+            start += len(texts)
+            query_embedding_cache.set(keys[i], embeddings[i])
+    return embeddings
+
+def semantic_search(backend, query_texts: List[str], n_results: int = 10,
+                    wheres: Optional[List[Optional[dict]]] = None):
+    wheres = wheres or [None] * len(query_texts)
+    where_keys = [json.dumps(where, sort_keys=True) if where else "" for where in wheres]
+
+    # Rankings are keyed by index version, so a new version never serves old results
+    keys = [
+        (backend.version, normalize_query(text), n_results, where_key)
+        for text, where_key in zip(query_texts, where_keys)
+    ]
+    rows = [query_result_cache.get(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        embeddings = dict(zip(missing, embed_queries([query_texts[i] for i in missing])))
+
+        # One multi-query search per distinct filter among the texts that missed
+        groups = {}
+        for i in missing:
+            groups.setdefault(where_keys[i], []).append(i)
+        for group in groups.values():
+            # Every chunk of every query goes into one backend call; each
+            # query then keeps the best score per assessment over its chunks
+            chunk_rows, start = [], 0
+            for i in group:
+                chunk_rows.append(list(range(start, start + len(embeddings[i]))))
+                start += len(embeddings[i])
+            with stage("search"):
+                results = merge_hits(backend.query(
+                    np.concatenate([embeddings[i] for i in group]).tolist(),
+                    n_results=n_results,
+                    where=wheres[group[0]]
+                ), chunk_rows, n_results)
+            for j, i in enumerate(group):
+                rows[i] = {field: results[field][j] for field in RESULT_FIELDS}
+                query_result_cache.set(keys[i], rows[i])
+    return {field: [row[field] for row in rows] for field in RESULT_FIELDS}
+
+def hybrid_search(backend, lexical_index, query_texts: List[str], n_results: int = 10,
+                  wheres: Optional[List[Optional[dict]]] = None):
+    wheres = wheres or [None] * len(query_texts)
+    semantic = semantic_search(backend, query_texts, HYBRID_CANDIDATES, wheres)
+
+    lexical = {field: [None] * len(query_texts) for field in ("ids", "metadatas", "documents")}
+    for where_key in dict.fromkeys(json.dumps(where, sort_keys=True) for where in wheres):
+        group = [i for i, where in enumerate(wheres) if json.dumps(where, sort_keys=True) == where_key]
+        with stage("search"):
+            results = lexical_index.query([query_texts[i] for i in group], HYBRID_CANDIDATES, wheres[group[0]])
+        for j, i in enumerate(group):
+            for field in lexical:
+                lexical[field][i] = results[field][j]
+
+    fused = {field: [] for field in RESULT_FIELDS + ("scores",)}
+    for q in range(len(query_texts)):
+        # Reciprocal-rank fusion only looks at positions, so BM25 scores and
+        # embedding distances never have to be put on a common scale
+        scores, hits = {}, {}
+        for ranking in (semantic, lexical):
+            for rank, (item_id, metadata, document) in enumerate(zip(ranking["ids"][q], ranking["metadatas"][q], ranking["documents"][q])):
+                scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+                hits.setdefault(item_id, (metadata, document))
+        distances = dict(zip(semantic["ids"][q], semantic["distances"][q]))
+
+        top = sorted(scores, key=scores.get, reverse=True)[:n_results]
+        fused["ids"].append(top)
+        fused["metadatas"].append([hits[item_id][0] for item_id in top])
+        fused["documents"].append([hits[item_id][1] for item_id in top])
+        fused["distances"].append([distances.get(item_id) for item_id in top])
+        # Rescaled so ranking first in both lists scores 1.0
+        fused["scores"].append([scores[item_id] * (RRF_K + 1) / 2 for item_id in top])
+    return fused
+
+def search_queries(backend, query_texts: List[str], wheres: List[Optional[dict]],
+                   modes: List[Optional[str]], n_results: List[int]):
+    lexical_index = search_state["lexical_index"]
+    hybrid = [(mode or SEARCH_MODE) == "hybrid" and lexical_index is not None for mode in modes]
+    results = {field: [None] * len(query_texts) for field in RESULT_FIELDS + ("scores",)}
+    for use_hybrid, n in dict.fromkeys(zip(hybrid, n_results)):
+        group = [i for i in range(len(query_texts)) if (hybrid[i], n_results[i]) == (use_hybrid, n)]
+        texts, group_wheres = [query_texts[i] for i in group], [wheres[i] for i in group]
+        if use_hybrid:
+            ranked = hybrid_search(backend, lexical_index, texts, n, group_wheres)
+        else:
+            ranked = semantic_search(backend, texts, n, group_wheres)
+        for j, i in enumerate(group):
+            for field in results:
+                results[field][i] = ranked[field][j] if field in ranked else None
+    return results
 
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=10,
-        include=["metadatas", "documents", "distances"]
+def rerank_results(results, query_texts: List[str], use_rerank: List[bool], n_results: int = 10):
+    # Queries that asked for a rerank were searched with RERANK_CANDIDATES hits;
+    # every other query already has its final top n_results
+    flagged = [q for q, flag in enumerate(use_rerank) if flag]
+    with stage("rerank"):
+        scores = rerank(
+            [normalize_query(query_texts[q]) for q in flagged],
+            [results["metadatas"][q] for q in flagged]
+        )
+    for j, q in enumerate(flagged):
+        if scores is None:
+            order = list(range(min(n_results, len(results["ids"][q]))))
+        else:
+            order = sorted(range(len(scores[j])), key=lambda i: scores[j][i], reverse=True)[:n_results]
+        for field in results:
+            if results[field][q] is not None:
+                results[field][q] = [results[field][q][i] for i in order]
+        if scores is not None:
+            results["scores"][q] = [scores[j][i] for i in order]
+    return results
+
+def rank_queries(backend, query_texts: List[str], queries: List[QueryRequest]):
+    use_rerank = [RERANK_DEFAULT if query.rerank is None else query.rerank for query in queries]
+    results = search_queries(
+        backend, query_texts,
+        [build_where(query.filters) for query in queries],
+        [query.mode for query in queries],
+        [RERANK_CANDIDATES if flag else 10 for flag in use_rerank]
     )
+    if any(use_rerank):
+        results = rerank_results(results, query_texts, use_rerank)
+    return results
 
+def build_recommendations(results, query_index: int = 0) -> List[dict]:
     recommendations = []
-    for i in range(len(results["ids"][0])):
-        metadata = results["metadatas"][0][i]
+    scores = results.get("scores", [None] * len(results["ids"]))[query_index]
+    for i in range(len(results["ids"][query_index])):
+        metadata = results["metadatas"][query_index][i]
         recommendations.append({
+            "id": results["ids"][query_index][i],  # For /assessments/{id}/similar
             "name": metadata["name"],
             "url": metadata["url"],
             "description": metadata["description"],
@@ -215,8 +607,188 @@ async def recommend(request: QueryRequest):
             "remote_testing": metadata.get("remote_testing", "❓"),
             "adaptive_support": metadata.get("adaptive/irt_support", "❓"),
             "test_type": metadata.get("test_type", "Not specified"),
-            "score": normalize_score(results["distances"][0][i]),
-            "ai_insights": generate_cohere_insights(metadata["description"]) if request.use_ai else ""
+            "score": scores[i] if scores else normalize_score(results["distances"][query_index][i]),
+            "ai_insights": ""
         })
+    return recommendations
+
+async def resolve_query_text(text: str) -> str:
+    if text.startswith(("http://", "https://")):
+        return await scrape_job_description(text)
+    return text
+
+def coalescing_key(request: QueryRequest, *extra):
+    # URLs are kept as submitted since paths and query strings are case-sensitive
+    text = request.text if request.text.startswith(("http://", "https://")) else normalize_query(request.text)
+    return (
+        search_state["version"], text,
+        json.dumps(build_where(request.filters), sort_keys=True),
+        request.mode or SEARCH_MODE,
+        RERANK_DEFAULT if request.rerank is None else request.rerank,
+        *extra
+    )
+
+async def coalesce(key, compute):
+    if not COALESCE_REQUESTS:
+        return await compute()
+    return await recommend_flights.run(key, compute)
+
+async def attach_insights(recommendations: List[dict]):
+    # Identical descriptions across rankings only need one insight
+    descriptions = list(dict.fromkeys(item["description"] for item in recommendations))
+    with stage("insights"):
+        insights = dict(zip(descriptions, await gather_insights(descriptions)))
+    for item in recommendations:
+        item["ai_insights"] = insights[item["description"]]
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "query_results": query_result_cache.stats(),
+        "job_text": job_text_cache.stats(),
+        "rerank_scores": rerank_cache.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def serialize(payload) -> JSONResponse:
+    # Encoding here rather than in FastAPI puts it under a stage of its own
+    with stage("serialize"):
+        return JSONResponse(content=payload)
+
+@app.get("/ready")
+async def ready():
+    if search_state["embedding_function"] is None or search_state["backend"] is None:
+        raise HTTPException(status_code=503, detail="Not ready")
+    return {
+        "status": "ready",
+        "index_version": search_state["version"],
+        "assessments": search_state["backend"].count(),
+        "filters": search_state["filterable"]
+    }
+
+@app.post("/recommend")
+async def recommend(request: QueryRequest):
+    backend = get_backend()
+    check_filters(request.filters)
+
+    async def compute():
+        query_text = await resolve_query_text(request.text)
+        results = await run_in_threadpool(rank_queries, backend, [query_text], [request])
+        recommendations = build_recommendations(results)
+
+        if request.use_ai:
+            await attach_insights(recommendations)
+        return recommendations
+
+    # Callers sharing a result only read it, so one list serves them all
+    recommendations = await coalesce(coalescing_key(request, "recommend", request.use_ai), compute)
+    return serialize(recommendations)
+
+def similar_filters(
+    max_duration: Optional[int] = None,
+    job_levels: Optional[List[str]] = Query(None),
+    languages: Optional[List[str]] = Query(None),
+    test_types: Optional[List[str]] = Query(None),
+    remote_testing: Optional[bool] = None,
+    adaptive: Optional[bool] = None
+) -> SearchFilters:
+    # SearchFilters as query parameters; list fields repeat, e.g. ?test_types=K&test_types=S
+    return SearchFilters(
+        max_duration=max_duration, job_levels=job_levels, languages=languages,
+        test_types=test_types, remote_testing=remote_testing, adaptive=adaptive
+    )
+
+@app.get("/assessments/{assessment_id}/similar")
+async def similar_assessments(assessment_id: str, limit: int = Query(10, ge=1, le=SIMILAR_TOP_N),
+                              filters: SearchFilters = Depends(similar_filters)):
+    """Catalog neighbours of one assessment, read from the table built by app/rag.py."""
+    get_backend()
+    check_filters(filters)
+    similar_index = search_state["similar_index"]
+    if similar_index is None:
+        raise HTTPException(status_code=503, detail="Similar-assessment index not built, run python -m app.rag")
+    if assessment_id not in similar_index:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
+    results = similar_index.query(assessment_id, limit, build_where(filters))
+    return serialize(build_recommendations(results))
+
+def format_event(event: dict, sse: bool) -> str:
+    data = json.dumps(event)
+    return f"event: {event['event']}\ndata: {data}\n\n" if sse else f"{data}\n"
+
+@app.post("/recommend/stream")
+async def recommend_stream(request: QueryRequest, http_request: Request):
+    """Same ranking as /recommend, streamed so results don't wait for insights.
+
+    Emits a "results" event with the ranked assessments (empty ai_insights),
+    then one "insight" event per assessment as its insight completes, then
+    "done". NDJSON by default; Server-Sent Events when the client accepts
+    text/event-stream.
+    """
+    backend = get_backend()
+    check_filters(request.filters)
+
+    async def compute():
+        query_text = await resolve_query_text(request.text)
+        results = await run_in_threadpool(rank_queries, backend, [query_text], [request])
+        return build_recommendations(results)
+
+    # Only the ranking is shared; insights stream per connection
+    recommendations = await coalesce(coalescing_key(request, "stream"), compute)
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def events():
+        yield format_event({"event": "results", "recommendations": recommendations}, sse)
+        if request.use_ai:
+            descriptions = list(dict.fromkeys(item["description"] for item in recommendations))
+            with stage("insights"):
+                async for i, insight in iter_insights(descriptions):
+                    for index, item in enumerate(recommendations):
+                        if item["description"] == descriptions[i]:
+                            yield format_event({"event": "insight", "index": index, "ai_insights": insight}, sse)
+        yield format_event({"event": "done"}, sse)
+
+    return StreamingResponse(events(), media_type="text/event-stream" if sse else "application/x-ndjson")
+
+@app.post("/recommend/batch")
+async def recommend_batch(request: BatchQueryRequest):
+    if len(request.queries) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch too large (max {MAX_BATCH_SIZE} queries)")
+    if not request.queries:
+        return []
+
+    backend = get_backend()
+
+    async def resolve(query: QueryRequest) -> str:
+        check_filters(query.filters)
+        return await resolve_query_text(query.text)
+
+    # A posting that can't be fetched, or a filter the index can't apply,
+    # fails its own entry, not the batch
+    query_texts = await asyncio.gather(*(resolve(query) for query in request.queries), return_exceptions=True)
+    for outcome in query_texts:
+        if isinstance(outcome, BaseException) and not isinstance(outcome, HTTPException):
+            raise outcome
+    rankings = [{"error": outcome.detail} if isinstance(outcome, HTTPException) else None for outcome in query_texts]
+
+    resolved = [i for i, ranking in enumerate(rankings) if ranking is None]
+    if resolved:
+        results = await run_in_threadpool(
+            rank_queries, backend, [query_texts[i] for i in resolved], [request.queries[i] for i in resolved]
+        )
+        for j, i in enumerate(resolved):
+            rankings[i] = build_recommendations(results, j)
+
+    await attach_insights([
+        item
+        for query, recommendations in zip(request.queries, rankings)
+        if query.use_ai and isinstance(recommendations, list)
+        for item in recommendations
+    ])
 
-    return recommendations
\ No newline at end of file
+    return serialize(rankings)
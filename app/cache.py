@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class DiskCache:
+    """Small persistent key/value store on top of SQLite.
+
+    Values are stored as JSON. Once the table grows past ``max_entries`` the
+    least recently used rows are evicted, so the file stays bounded. Access
+    times are only rewritten once they are ``touch_interval`` seconds old, so
+    most reads never write. If another process holds the lock for longer than
+    ``busy_timeout`` seconds, reads count as misses and writes are skipped
+    instead of raising.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, touch_interval: float = 300.0,
+                 busy_timeout: float = 1.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so importing a module that defines a cache
+        # doesn't touch the disk. A SQLite connection must not be used across
+        # fork(), so workers forked from a preloaded app (see gunicorn.conf.py)
+        # each open their own.
+        if self._pid != os.getpid():
+            Path(os.path.dirname(self.path) or ".").mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+                conn.commit()
+            except sqlite3.OperationalError:
+                conn.close()  # Retried on the next call
+                raise
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute("SELECT value, accessed_at FROM cache WHERE key = ?", (key,)).fetchone()
+            except sqlite3.OperationalError:
+                return None  # Locked by another worker; the caller recomputes
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] >= self.touch_interval:
+                try:
+                    conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                except sqlite3.OperationalError:
+                    conn.rollback()  # Eviction order is approximate anyway
+        return json.loads(row[0])
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            try:
+                return self._connection().execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone() is not None
+            except sqlite3.OperationalError:
+                return False
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            try:
+                conn = self._connection()
+            except sqlite3.OperationalError:
+                return  # Not cached this time; the value is still returned to the caller
+            try:
+                self._write(conn, key, value)
+            except sqlite3.OperationalError:
+                conn.rollback()
+
+    def _write(self, conn: sqlite3.Connection, key: str, value: Any):
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, accessed_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time())
+        )
+        overflow = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+        conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class TTLCache:
+    """In-memory LRU cache whose entries also expire ``ttl`` seconds after being set.
+
+    ``maxsize`` bounds the number of entries. Passing ``max_bytes`` together with a
+    ``sizeof`` function also bounds the total size of the cached values. Hits and
+    misses are counted for ``stats()``.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0,
+                 max_bytes: Optional[int] = None, sizeof: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key):
+        self._bytes -= self._data.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """Concurrent callers with the same key share one in-progress computation.
+
+    The first caller starts ``compute()`` as a task; callers arriving while it
+    runs await the same task and get the same result (or exception). Nothing
+    is kept once it finishes, so this complements a cache rather than being one.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(compute())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.followers += 1
+        # Shielded so one caller disconnecting doesn't cancel the others' result
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller went away
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._flights), "leaders": self.leaders, "followers": self.followers}
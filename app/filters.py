@@ -0,0 +1,146 @@
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+# The scraped catalog stores these fields as display strings ("Approximate
+# Completion Time in minutes = 49", "Mid-Professional,", "🟢", "CPAB"). At
+# index time they are normalised into typed scalar metadata that both Chroma
+# and the NumPy backend can filter on. Chroma metadata values must be scalars,
+# so set-valued fields become one boolean flag per member.
+
+UNKNOWN_DURATION = -1
+# Written for every item by typed_metadata; indexes built before typed
+# metadata existed lack it, and every filter then matches nothing
+TYPED_METADATA_KEY = "duration_minutes"
+
+
+class SearchFilters(BaseModel):
+    max_duration: Optional[int] = None  # Minutes; assessments of unknown length are excluded
+    job_levels: Optional[List[str]] = None  # Matches any of, e.g. ["Graduate", "Mid-Professional"]
+    languages: Optional[List[str]] = None  # Matches any of, e.g. ["English (USA)"]
+    test_types: Optional[List[str]] = None  # Matches any of the letters, e.g. ["K", "S"]
+    remote_testing: Optional[bool] = None
+    adaptive: Optional[bool] = None
+
+
+def slugify(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+
+
+def level_key(level: str) -> str:
+    return f"level_{slugify(level)}"
+
+
+def language_key(language: str) -> str:
+    return f"language_{slugify(language)}"
+
+
+def test_type_key(letter: str) -> str:
+    return f"test_type_{letter.strip().upper()}"
+
+
+def parse_duration_minutes(duration: str) -> int:
+    """Upper bound in minutes of a catalog duration, or UNKNOWN_DURATION.
+
+    Ranges ("15 to 35") count as their largest number, so max_duration never
+    admits a test that can run longer. Untimed tests ("Untimed, approx. 25")
+    have no upper bound and count as unknown.
+    """
+    if "untimed" in (duration or "").lower():
+        return UNKNOWN_DURATION
+    numbers = [int(number) for number in re.findall(r"\d+", duration or "")]
+    return max(numbers) if numbers else UNKNOWN_DURATION
+
+
+def parse_job_levels(job_level: str) -> List[str]:
+    if not job_level or job_level == "Level not specified":
+        return []
+    return [level.strip() for level in job_level.split(",") if level.strip()]
+
+
+def parse_test_types(test_type: str) -> List[str]:
+    # Real values are runs of capital letters ("CPAB", "K S"); anything else is a placeholder
+    if not test_type or not re.fullmatch(r"[A-Z ]+", test_type):
+        return []
+    return sorted(set(test_type.replace(" ", "")))
+
+
+def typed_metadata(item: dict) -> dict:
+    """Filterable metadata fields for one catalog item."""
+    languages = item["languages"] if isinstance(item["languages"], list) else [item["languages"]]
+    metadata = {
+        "duration_minutes": parse_duration_minutes(item["duration"]),
+        "remote_testing_supported": item["remote_testing"] == "🟢",
+        "adaptive_supported": item["adaptive/irt_support"] == "🟢",
+    }
+    for level in parse_job_levels(item["job_level"]):
+        metadata[level_key(level)] = True
+    for language in languages:
+        if language:
+            metadata[language_key(language)] = True
+    for letter in parse_test_types(item["test_type"]):
+        metadata[test_type_key(letter)] = True
+    return metadata
+
+
+def has_typed_metadata(metadatas: List[dict]) -> bool:
+    """Whether the given index metadata was built by typed_metadata and can be filtered."""
+    return all(TYPED_METADATA_KEY in metadata for metadata in metadatas)
+
+
+def any_of(keys: List[str]) -> dict:
+    clauses = [{key: True} for key in dict.fromkeys(keys)]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def build_where(filters: Optional[SearchFilters]) -> Optional[dict]:
+    """Translate request filters into a Chroma ``where`` clause (None if unfiltered)."""
+    if filters is None:
+        return None
+
+    clauses = []
+    if filters.max_duration is not None:
+        clauses.append({"duration_minutes": {"$gte": 0}})
+        clauses.append({"duration_minutes": {"$lte": filters.max_duration}})
+    if filters.job_levels:
+        clauses.append(any_of([level_key(level) for level in filters.job_levels]))
+    if filters.languages:
+        clauses.append(any_of([language_key(language) for language in filters.languages]))
+    if filters.test_types:
+        clauses.append(any_of([test_type_key(letter) for letter in filters.test_types]))
+    if filters.remote_testing is not None:
+        clauses.append({"remote_testing_supported": filters.remote_testing})
+    if filters.adaptive is not None:
+        clauses.append({"adaptive_supported": filters.adaptive})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def matches(metadata: dict, where: Optional[dict]) -> bool:
+    """Evaluate a ``where`` clause from build_where against one metadata dict."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if value is None:
+                return False
+            for operator, operand in condition.items():
+                if operator == "$gte" and not value >= operand:
+                    return False
+                if operator == "$lte" and not value <= operand:
+                    return False
+                if operator == "$eq" and not value == operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
@@ -0,0 +1,289 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+
+from app.cache import DiskCache
+from app.metrics import Counter
+
+# Load environment variables
+load_dotenv()
+
+# The Cohere SDK is slow to import, so the client is created on the first
+# insight request instead of at startup
+cohere_state = {"client": None, "loaded": False}
+_cohere_lock = threading.Lock()
+
+def get_cohere_client():
+    with _cohere_lock:
+        if not cohere_state["loaded"]:
+            # Initialize Cohere (free tier)
+            try:
+                import cohere
+                # COHERE_BASE_URL points the client at another server, e.g. benchmarks/stub_llm.py
+                options = {"base_url": os.getenv("COHERE_BASE_URL")} if os.getenv("COHERE_BASE_URL") else {}
+                cohere_state["client"] = cohere.Client(os.getenv("COHERE_API_KEY"), **options)
+            except:
+                cohere_state["client"] = None
+            cohere_state["loaded"] = True
+    return cohere_state["client"]
+
+# Bump whenever the prompt or generation settings change so stale insights
+# are not served from the cache
+PROMPT_VERSION = "v1"
+# The batched prompt phrases things differently and shares a token budget, so
+# its answers are cached under their own version and never served as, or
+# overwritten by, single-prompt answers. The batched path does read
+# single-prompt answers, e.g. those written by warm_insight_cache
+BATCH_PROMPT_VERSION = "batch-v1"
+COHERE_MODEL = "command"
+
+# Insight fan-out: at most INSIGHT_CONCURRENCY Cohere calls in flight per request,
+# and whatever hasn't finished by INSIGHT_DEADLINE seconds gets a placeholder
+INSIGHT_CONCURRENCY = int(os.getenv("INSIGHT_CONCURRENCY", "5"))
+INSIGHT_DEADLINE = float(os.getenv("INSIGHT_DEADLINE", "20"))
+INSIGHT_PLACEHOLDER = "AI insights unavailable (timed out)"
+INSIGHT_MAX_TOKENS = 50  # Per assessment
+
+# "batched" packs up to INSIGHT_BATCH_SIZE uncached descriptions into one
+# prompt, so a request costs one round-trip and one rate-limit token instead
+# of one per assessment; "single" sends one prompt per description
+INSIGHT_MODE = os.getenv("INSIGHT_MODE", "batched").lower()
+INSIGHT_BATCH_SIZE = int(os.getenv("INSIGHT_BATCH_SIZE", "10"))
+
+insight_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("INSIGHT_WORKERS", "16")),
+    thread_name_prefix="cohere"
+)
+
+COHERE_CALLS = Counter("cohere_calls_total", "Cohere generate calls by prompt mode")
+COHERE_FAILURES = Counter("cohere_failures_total", "Cohere generate calls that raised, by prompt mode")
+INSIGHT_CACHE_LOOKUPS = Counter("insight_cache_lookups_total", "Insight cache lookups by result")
+INSIGHT_FALLBACKS = Counter(
+    "insight_fallbacks_total",
+    "Insights not produced as requested, by reason (batch_retry, timeout, error, no_client)"
+)
+
+insight_cache = DiskCache(
+    os.getenv("INSIGHT_CACHE_PATH", os.path.join("data", "insight_cache.sqlite3")),
+    max_entries=int(os.getenv("INSIGHT_CACHE_SIZE", "5000"))
+)
+
+def insight_cache_key(description: str, prompt_version: str = PROMPT_VERSION) -> str:
+    payload = f"{prompt_version}\0{COHERE_MODEL}\0{description}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_insight_prompt(description: str) -> str:
+    return f"""As an HR expert, analyze this assessment description and provide 3 concise insights:
+
+        Description: {description[:300]}
+
+        Format as:
+        1. Key skills measured
+        2. Ideal candidate level
+        3. Best use case"""
+
+def build_batch_insight_prompt(descriptions: List[str]) -> str:
+    sections = "\n\n".join(
+        f"        [{i}] Description: {description[:300]}" for i, description in enumerate(descriptions, 1)
+    )
+    return f"""As an HR expert, analyze each of these {len(descriptions)} assessment descriptions and provide 3 concise insights for each:
+
+{sections}
+
+        Answer every assessment in order. Start each answer with its number in
+        brackets on a line of its own, then format it as:
+        [n]
+        1. Key skills measured
+        2. Ideal candidate level
+        3. Best use case"""
+
+BATCH_SECTION_PATTERN = re.compile(r"^[ \t]*\[(\d+)\][ \t]*(?:Description:?)?[ \t]*$", re.MULTILINE)
+
+def parse_batch_insights(text: str, count: int) -> List[Optional[str]]:
+    """Split a batched answer back into per-assessment insights (None where a section is missing)."""
+    insights = [None] * count
+    markers = list(BATCH_SECTION_PATTERN.finditer(text))
+    for marker, following in zip(markers, markers[1:] + [None]):
+        number = int(marker.group(1))
+        body = text[marker.end():following.start() if following else len(text)].strip()
+        if 1 <= number <= count and body and insights[number - 1] is None:
+            insights[number - 1] = body
+    return insights
+
+def cached_batch_insight(key: str, description: str) -> Optional[str]:
+    insight = insight_cache.get(key)
+    return insight if insight is not None else insight_cache.get(insight_cache_key(description))
+
+def generate_batched_insights(descriptions: List[str]) -> List[Optional[str]]:
+    """Insights for several descriptions from one Cohere call.
+
+    Descriptions with a cached batched or single-prompt answer are answered
+    from the cache. Entries that can't be parsed out of the answer come back
+    as None, for the caller to retry with single prompts; when the call itself
+    fails they get the same placeholder as a failed single prompt.
+    """
+    keys = [insight_cache_key(description, BATCH_PROMPT_VERSION) for description in descriptions]
+    insights = [cached_batch_insight(key, description) for key, description in zip(keys, descriptions)]
+    missing = [i for i, insight in enumerate(insights) if insight is None]
+    INSIGHT_CACHE_LOOKUPS.inc(len(insights) - len(missing), result="hit")
+    if len(missing) <= 1:
+        # Nothing to batch; the single path counts its own lookup
+        return [insight if insight is not None else generate_cohere_insights(description)
+                for insight, description in zip(insights, descriptions)]
+
+    INSIGHT_CACHE_LOOKUPS.inc(len(missing), result="miss")
+    co = get_cohere_client()
+    if not co:
+        INSIGHT_FALLBACKS.inc(len(missing), reason="no_client")
+        return [insight if insight is not None else "AI insights unavailable" for insight in insights]
+
+    COHERE_CALLS.inc(mode="batched")
+    try:
+        response = co.generate(
+            model=COHERE_MODEL,
+            prompt=build_batch_insight_prompt([descriptions[i] for i in missing]),
+            max_tokens=INSIGHT_MAX_TOKENS * len(missing),
+            temperature=0.5
+        )
+        text = response.generations[0].text
+    except Exception as e:
+        # A rate limit or network error would only get worse with one retry
+        # per section, so every missing entry gets the placeholder instead
+        COHERE_FAILURES.inc(mode="batched")
+        return [insight if insight is not None else "AI insights unavailable" for insight in insights]
+
+    parsed = parse_batch_insights(text, len(missing))
+    for i, insight in zip(missing, parsed):
+        if insight is not None:
+            insights[i] = insight
+            insight_cache.set(keys[i], insight)
+    return insights
+
+def generate_cohere_insights(description: str) -> str:
+    key = insight_cache_key(description)
+    cached = insight_cache.get(key)
+    if cached is not None:
+        INSIGHT_CACHE_LOOKUPS.inc(result="hit")
+        return cached
+
+    INSIGHT_CACHE_LOOKUPS.inc(result="miss")
+    co = get_cohere_client()
+    if not co:
+        INSIGHT_FALLBACKS.inc(reason="no_client")
+        return "AI insights unavailable"
+
+    COHERE_CALLS.inc(mode="single")
+    try:
+        response = co.generate(
+            model=COHERE_MODEL,
+            prompt=build_insight_prompt(description),
+            max_tokens=INSIGHT_MAX_TOKENS,
+            temperature=0.5
+        )
+        insight = response.generations[0].text
+    except Exception as e:
+        COHERE_FAILURES.inc(mode="single")
+        return "AI insights unavailable"
+
+    # Only successful generations are cached, so failures get retried later
+    insight_cache.set(key, insight)
+    return insight
+
+async def iter_insights(descriptions: List[str]) -> AsyncIterator[Tuple[int, str]]:
+    """Yield (index, insight) as each insight finishes, in completion order.
+
+    Whatever is still running at INSIGHT_DEADLINE is cancelled and yielded
+    with the placeholder, so every index comes out exactly once.
+    """
+    if not descriptions:
+        return
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(INSIGHT_CONCURRENCY)
+
+    async def run(function, argument):
+        async with semaphore:
+            return await loop.run_in_executor(insight_executor, function, argument)
+
+    def single(i: int) -> asyncio.Task:
+        return asyncio.create_task(run(lambda description: [generate_cohere_insights(description)], descriptions[i]))
+
+    # Each task answers a list of indices: one per single prompt, up to
+    # INSIGHT_BATCH_SIZE per batched prompt
+    tasks = {}
+    if INSIGHT_MODE == "batched":
+        for start in range(0, len(descriptions), INSIGHT_BATCH_SIZE):
+            indices = list(range(start, min(start + INSIGHT_BATCH_SIZE, len(descriptions))))
+            tasks[asyncio.create_task(run(generate_batched_insights, [descriptions[i] for i in indices]))] = indices
+    else:
+        tasks = {single(i): [i] for i in range(len(descriptions))}
+
+    deadline = loop.time() + INSIGHT_DEADLINE
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in sorted(done, key=lambda task: tasks[task][0]):
+                if task.exception():
+                    INSIGHT_FALLBACKS.inc(len(tasks[task]), reason="error")
+                    for i in tasks[task]:
+                        yield i, INSIGHT_PLACEHOLDER
+                    continue
+                for i, insight in zip(tasks[task], task.result()):
+                    if insight is not None:
+                        yield i, insight
+                    else:
+                        # Section missing from a batched answer: retry it alone
+                        INSIGHT_FALLBACKS.inc(reason="batch_retry")
+                        retry = single(i)
+                        tasks[retry] = [i]
+                        pending.add(retry)
+        for task in sorted(pending, key=lambda task: tasks[task][0]):
+            INSIGHT_FALLBACKS.inc(len(tasks[task]), reason="timeout")
+            for i in tasks[task]:
+                yield i, INSIGHT_PLACEHOLDER
+    finally:
+        # Also runs when a streaming client disconnects mid-way
+        for task in pending:
+            task.cancel()
+
+async def gather_insights(descriptions: List[str]) -> List[str]:
+    insights = [INSIGHT_PLACEHOLDER] * len(descriptions)
+    async for i, insight in iter_insights(descriptions):
+        insights[i] = insight
+    return insights
+
+def warm_insight_cache(json_path: str = os.path.join("data", "shl_assessments_complete.json")):
+    """Generate and cache insights for every assessment in the catalog.
+
+    Single prompts are used, whose answers both insight modes read.
+    """
+    with open(json_path, "r") as f:
+        assessments = json.load(f)
+
+    descriptions = {item["description"] for item in assessments if item.get("description")}
+    missing = [d for d in descriptions if insight_cache_key(d) not in insight_cache]
+    print(f"🔥 Warming insight cache: {len(missing)} of {len(descriptions)} descriptions missing")
+
+    failed = 0
+    for i, description in enumerate(missing, 1):
+        generate_cohere_insights(description)
+        if insight_cache_key(description) not in insight_cache:
+            failed += 1
+        if i % 25 == 0:
+            print(f"📄 {i}/{len(missing)} done")
+
+    print(f"🚀 Insight cache holds {len(insight_cache)} entries ({failed} failed, rerun to retry)")
+
+if __name__ == "__main__":
+    warm_insight_cache()
@@ -0,0 +1,117 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Minimal Prometheus text-format metrics, so the API can expose /metrics
+# without another dependency. Label values are kept low-cardinality by the
+# callers (stage names, route templates, cache names).
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+registry = []
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(dict(key))} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series = {}  # labels -> (bucket counts, sum, count)
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self._series.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._series[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = dict(key)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': bound})} {bucket_count}")
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': '+Inf'})} {count}")
+                lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Samples read at scrape time, e.g. hit counters a cache already keeps."""
+
+    def __init__(self, name: str, help: str, type: str, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.collect = collect
+        registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in self.collect():
+            lines.append(f"{self.name}{format_labels(labels)} {value}")
+        return lines
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+STAGE_SECONDS = Histogram("recommend_stage_seconds", "Time spent per recommend pipeline stage")
+
+# Durations of the stages run for the current request, summed per stage, for
+# the Server-Timing header. Starlette copies the context into threadpool
+# calls, so stages timed in worker threads land in the same dict.
+request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_timings", default=None)
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
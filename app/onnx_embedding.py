@@ -0,0 +1,95 @@
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+
+from app.rag import EMBEDDING_MODEL
+
+# Exported once with `python -m app.onnx_embedding`; serving then only needs
+# onnxruntime and tokenizers, not PyTorch
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("app", "onnx_model"))
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets onnxruntime pick
+MAX_SEQ_LENGTH = 256  # Same truncation as the sentence-transformers model
+EMBEDDING_DIM = 384
+
+class OnnxEmbeddingFunction:
+    """all-MiniLM-L6-v2 on onnxruntime with int8 dynamically quantized weights.
+
+    Reproduces the sentence-transformers pipeline (BERT, mean pooling over the
+    attention mask, L2 normalisation) and is a drop-in for ChromaEmbeddingFunction.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, batch_size: int = 32):
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"No ONNX model at {model_path}, run python -m app.onnx_embedding to export it")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = ONNX_THREADS
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()  # Pads to the longest text in each batch
+        self.batch_size = batch_size
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return [embedding.tolist() for embedding in self.encode(input)]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        # Batching texts of similar length keeps padding, and so wasted compute, low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self._tokenizer.encode_batch([texts[i] for i in batch])
+            input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+            attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            hidden = self._session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            embeddings[batch] = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+def export_onnx_model(model_dir: str = ONNX_MODEL_DIR):
+    """Export the float model to ONNX and quantize its weights to int8 (needs torch and onnx)."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+    hub_name = f"sentence-transformers/{EMBEDDING_MODEL}"
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    tokenizer.save_pretrained(model_dir)  # Writes tokenizer.json for the Rust tokenizer
+    model = AutoModel.from_pretrained(hub_name, torchscript=True).eval()
+
+    sample = tokenizer(["warm up"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    float_path = os.path.join(model_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+            opset_version=14
+        )
+
+    quantized_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+    quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QInt8)
+    os.remove(float_path)
+    print(f"🚀 Exported int8 ONNX model to {quantized_path} ({os.path.getsize(quantized_path) / 2**20:.1f} MiB)")
+
+if __name__ == "__main__":
+    export_onnx_model(sys.argv[1] if len(sys.argv) > 1 else ONNX_MODEL_DIR)
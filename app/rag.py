@@ -1,27 +1,122 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
+import hashlib
 import json
 import os
+import shutil
+import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+
+from app.filters import typed_metadata
+from app.search import export_bm25_index, export_numpy_index, export_similar_index
+
+# Shared between index build and query time so both sides embed with the same model
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "torch" runs the model through sentence-transformers, "onnx" runs the int8
+# export from app/onnx_embedding.py without importing PyTorch at all
+EMBEDDING_RUNTIME = os.getenv("EMBEDDING_RUNTIME", "torch").lower()
+# Part of every content hash: switching runtime re-embeds the catalog, so
+# index and query vectors always come from the same weights
+EMBEDDING_KEY = EMBEDDING_MODEL if EMBEDDING_RUNTIME == "torch" else f"{EMBEDDING_MODEL}:{EMBEDDING_RUNTIME}-int8"
+COLLECTION_NAME = "shl_assessments"
+CHROMA_PATH = os.path.join("app", "chroma_db")
+NUMPY_INDEX_PATH = os.path.join("app", "numpy_index")
+INDEX_POINTER_PATH = os.path.join("app", "index_pointer.json")
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))
+# Part of the version fingerprint: bump whenever the files written next to the
+# collection change layout, so re-running this module rebuilds an old index
+# instead of reporting it as already active
+INDEX_FORMAT = "2"
+
+# MiniLM truncates input at 256 word pieces, so long descriptions and job
+# postings are embedded as overlapping windows of CHUNK_WORDS words (roughly
+# 200 word pieces) and scored by their best-matching window
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", "150"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "30"))
+
+# Nearest catalog neighbours stored per assessment for /assessments/{id}/similar;
+# filtered lookups pick from these, so keep it well above the page size
+SIMILAR_TOP_N = int(os.getenv("SIMILAR_TOP_N", "50"))
 
 class ChromaEmbeddingFunction:
     def __init__(self):
-        self._model = SentenceTransformer("all-MiniLM-L6-v2")
+        from sentence_transformers import SentenceTransformer  # Pulls in PyTorch
+        self._model = SentenceTransformer(EMBEDDING_MODEL)
     
     def __call__(self, input: List[str]) -> List[List[float]]:
         embeddings = self._model.encode(input)
         return [embedding.tolist() for embedding in embeddings]
     
+def create_embedding_function():
+    if EMBEDDING_RUNTIME == "onnx":
+        from app.onnx_embedding import OnnxEmbeddingFunction
+        return OnnxEmbeddingFunction()
+    return ChromaEmbeddingFunction()
+
+
+def chunk_text(text: str, size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    words = text.split()
+    if len(words) <= size:
+        return [" ".join(words)]
+    step = max(size - overlap, 1)
+    return [" ".join(words[start:start + size]) for start in range(0, len(words) - overlap, step)]
+
+def assessment_chunks(item: dict) -> List[str]:
+    # Only the name and description carry meaning for the embedding; the URL,
+    # duration and flag columns stay in the BM25 document and metadata. Every
+    # window keeps the name so it still says which assessment it belongs to.
+    return [f"{item['name']}: {chunk}" for chunk in chunk_text(item["description"])]
 
 def stringify(value):
     if isinstance(value, list):
         return ", ".join(map(str, value))
     return value
 
+def assessment_id(url: str) -> str:
+    # Derived from the URL so an assessment keeps its ID across scrapes
+    return hashlib.sha1(url.strip().encode("utf-8")).hexdigest()[:16]
+
+def content_hash(document: str, metadata: dict) -> str:
+    payload = json.dumps([EMBEDDING_KEY, document, metadata], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def document_hash(document: str) -> str:
+    # The embedding only depends on the text and the model, so metadata-only
+    # changes can reuse the stored vector; switching models re-embeds everything
+    return hashlib.sha256(f"{EMBEDDING_KEY}\0{document}".encode("utf-8")).hexdigest()
+
+def versioned_collection_name(version: Optional[str]) -> str:
+    # Chroma only allows [a-zA-Z0-9._-] in names; no version means the legacy collection
+    return f"{COLLECTION_NAME}-{version}" if version else COLLECTION_NAME
+
+def numpy_index_path(version: Optional[str]) -> str:
+    return os.path.join(NUMPY_INDEX_PATH, version) if version else NUMPY_INDEX_PATH
+
+def read_index_pointer() -> dict:
+    try:
+        with open(INDEX_POINTER_PATH, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"active": None, "history": []}
+
+def write_index_pointer(pointer: dict):
+    # Write-then-rename so readers never see a half-written pointer
+    tmp_path = f"{INDEX_POINTER_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(pointer, f)
+    os.replace(tmp_path, INDEX_POINTER_PATH)
+
+def drop_index_version(chroma_client, version: str):
+    try:
+        chroma_client.delete_collection(versioned_collection_name(version))
+    except ValueError:
+        pass
+    shutil.rmtree(numpy_index_path(version), ignore_errors=True)
+
 def create_vector_db():
+    import chromadb  # Not needed by the API when it serves the NumPy index
+
     # Initialize ChromaDB with explicit path
-    chroma_path = os.path.join("app", "chroma_db")
+    chroma_path = CHROMA_PATH
     Path(chroma_path).mkdir(parents=True, exist_ok=True)
     chroma_client = chromadb.PersistentClient(path=chroma_path)
 
@@ -38,9 +133,11 @@ def create_vector_db():
         if not isinstance(assessments, list):
             raise ValueError("JSON data should be a list of assessments")
 
-    # Prepare documents and metadata
+    # Prepare documents and metadata, keyed by a stable ID derived from the URL
+    ids = []
     documents = []
     metadatas = []
+    chunks = []
     
     for i, item in enumerate(assessments):
         if not isinstance(item, dict):
@@ -51,9 +148,14 @@ def create_vector_db():
         if not all(field in item for field in required_fields):
             print(f"⚠️ Skipping incomplete item at index {i}")
             continue
+
+        item_id = assessment_id(item["url"])
+        if item_id in ids:
+            print(f"⚠️ Skipping duplicate URL at index {i}")
+            continue
             
-        documents.append(f"{item['name']}: {item['description']}: {item['url']}: {item['duration']}: {item['languages']}: {item['job_level']}: {item['remote_testing']}: {item['adaptive/irt_support']}: {item['test_type']}")
-        metadatas.append({
+        document = f"{item['name']}: {item['description']}: {item['url']}: {item['duration']}: {item['languages']}: {item['job_level']}: {item['remote_testing']}: {item['adaptive/irt_support']}: {item['test_type']}"
+        metadata = {
             "name": item["name"],
             "url": item["url"],
             "description": item["description"],
@@ -62,37 +164,124 @@ def create_vector_db():
             "job_level": item["job_level"],
             "remote_testing": item["remote_testing"],
             "adaptive/irt_support": item["adaptive/irt_support"],
-            "test_type": item["test_type"]
-        })
+            "test_type": item["test_type"],
+            **typed_metadata(item)
+        }
+        metadata["document_hash"] = document_hash(document)
+        metadata["content_hash"] = content_hash(document, metadata)
+
+        ids.append(item_id)
+        documents.append(document)
+        metadatas.append(metadata)
+        chunks.append(assessment_chunks(item))
 
     if not documents:
         raise ValueError("No valid assessments found in JSON data")
 
-    # Create or recreate collection
+    # The version is a fingerprint of the whole catalog, so an unchanged
+    # catalog maps to the collection that is already being served
+    fingerprint = [f"format:{INDEX_FORMAT}", f"chunks:{CHUNK_WORDS}:{CHUNK_OVERLAP}", f"similar:{SIMILAR_TOP_N}"]
+    fingerprint += sorted(f"{item_id}:{metadata['content_hash']}" for item_id, metadata in zip(ids, metadatas))
+    version = hashlib.sha256("\n".join(fingerprint).encode("utf-8")).hexdigest()[:12]
+    collection_name = versioned_collection_name(version)
+    pointer = read_index_pointer()
+
+    if pointer["active"] == version:
+        print(f"✅ Index version {version} is already active, nothing to do")
+        return version
+
+    # Vectors of unchanged chunks are copied from the live version
+    previous = {}
+    previous_vectors = {}
     try:
-        chroma_client.delete_collection("shl_assessments")
-        print("♻️ Replaced existing collection")
+        live = chroma_client.get_collection(versioned_collection_name(pointer["active"]))
+        existing = live.get(include=["metadatas", "embeddings"])
+        for existing_id, existing_metadata, embedding in zip(existing["ids"], existing["metadatas"], existing["embeddings"]):
+            previous[existing_metadata.get("assessment_id", existing_id)] = existing_metadata.get("content_hash")
+            if "chunk_hash" in existing_metadata:
+                previous_vectors[existing_metadata["chunk_hash"]] = embedding
     except ValueError:
-        pass  # Collection didn't exist
+        pass  # Nothing built yet
 
-    # Create collection with proper embedding function
+    # A leftover collection with this name can only come from an interrupted build
+    try:
+        chroma_client.delete_collection(collection_name)
+    except ValueError:
+        pass
+
+    # One row per chunk, grouped by assessment. Query-time pooling keeps each
+    # assessment's best chunk, so Chroma has to fetch up to max_chunks rows per hit.
+    chunk_ids, chunk_texts, chunk_metadatas = [], [], []
+    for item_id, metadata, texts in zip(ids, metadatas, chunks):
+        for k, text in enumerate(texts):
+            chunk_ids.append(f"{item_id}-{k}")
+            chunk_texts.append(text)
+            chunk_metadatas.append({**metadata, "assessment_id": item_id, "chunk": k, "chunk_hash": document_hash(text)})
+
+    embedding_function = create_embedding_function()
     collection = chroma_client.create_collection(
-        name="shl_assessments",
-        embedding_function=ChromaEmbeddingFunction()
+        name=collection_name,
+        embedding_function=embedding_function,
+        metadata={"max_chunks": max(len(texts) for texts in chunks), "assessments": len(ids)}
     )
 
+    # Every new chunk across the catalog goes through one batched encode, so
+    # build time grows linearly with the number of changed chunks
+    to_embed = list(dict.fromkeys(
+        (metadata["chunk_hash"], text) for metadata, text in zip(chunk_metadatas, chunk_texts)
+        if metadata["chunk_hash"] not in previous_vectors
+    ))
+    if to_embed:
+        previous_vectors.update(zip(
+            [chunk_hash for chunk_hash, _ in to_embed],
+            embedding_function([text for _, text in to_embed])
+        ))
+    embeddings = [previous_vectors[metadata["chunk_hash"]] for metadata in chunk_metadatas]
+
+    changed = sum(1 for j, item_id in enumerate(ids) if previous.get(item_id) != metadatas[j]["content_hash"])
+    added = sum(1 for item_id in ids if item_id not in previous)
+    removed = len(set(previous) - set(ids))
+    print(f"♻️ {added} added, {changed - added} updated, {removed} removed, {len(ids) - changed} unchanged ({len(to_embed)} of {len(chunk_ids)} chunks embedded)")
+
     # Add data in batches
     batch_size = 100
-    for i in range(0, len(documents), batch_size):
-        batch_end = min(i + batch_size, len(documents))
+    for i in range(0, len(chunk_ids), batch_size):
+        batch_end = min(i + batch_size, len(chunk_ids))
         collection.add(
-            documents=documents[i:batch_end],
-            metadatas=metadatas[i:batch_end],
-            ids=[str(j) for j in range(i, batch_end)]
+            ids=chunk_ids[i:batch_end],
+            documents=chunk_texts[i:batch_end],
+            metadatas=chunk_metadatas[i:batch_end],
+            embeddings=embeddings[i:batch_end]
         )
 
-    print(f"🚀 Success! Created vector DB with {len(documents)} assessments")
-    print(f"📁 ChromaDB stored at: {chroma_path}")
+    export_numpy_index(numpy_index_path(version), ids, embeddings, documents, metadatas, [len(texts) for texts in chunks])
+    export_bm25_index(numpy_index_path(version), documents)
+    export_similar_index(numpy_index_path(version), embeddings, [len(texts) for texts in chunks], SIMILAR_TOP_N)
+
+    # Flip the pointer only once the new version is complete; the API picks it up
+    # on its next poll. Older versions are kept around for rollback.
+    history = [version] + [v for v in pointer["history"] if v != version]
+    write_index_pointer({"active": version, "history": history[:INDEX_KEEP_VERSIONS]})
+    for stale in history[INDEX_KEEP_VERSIONS:]:
+        drop_index_version(chroma_client, stale)
+
+    print(f"🚀 Success! Index version {version} is live with {len(documents)} assessments ({len(chunk_ids)} chunks)")
+    print(f"📁 ChromaDB stored at: {chroma_path} (collection '{collection_name}')")
+    print(f"📁 NumPy, BM25 and similar-assessment indexes stored at: {numpy_index_path(version)}")
+    return version
+
+def rollback_index():
+    pointer = read_index_pointer()
+    if len(pointer["history"]) < 2:
+        raise ValueError("No previous index version to roll back to")
+
+    history = pointer["history"][1:] + pointer["history"][:1]
+    write_index_pointer({"active": history[0], "history": history})
+    print(f"⏪ Rolled back from {pointer['active']} to {history[0]}")
+    return history[0]
 
 if __name__ == "__main__":
-    create_vector_db()
\ No newline at end of file
+    if sys.argv[1:] == ["rollback"]:
+        rollback_index()
+    else:
+        create_vector_db()
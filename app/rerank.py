@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import List, Optional
+from dotenv import load_dotenv
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from app.cache import TTLCache
+from app.metrics import Counter
+
+# Load environment variables
+load_dotenv()
+
+# Second stage: the first-stage search returns RERANK_CANDIDATES hits, which a
+# small local cross-encoder rescores in one batched forward pass. If scoring
+# doesn't finish within RERANK_BUDGET_MS, first-stage order is kept.
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_DEFAULT = os.getenv("RERANK", "false").lower() in ("1", "true", "yes")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_BUDGET = float(os.getenv("RERANK_BUDGET_MS", "150")) / 1000
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "64"))
+
+# One worker: the model already uses every core for a single batch, and
+# requests queued behind it are better served by the fallback
+rerank_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+rerank_cache = TTLCache(
+    maxsize=int(os.getenv("RERANK_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("RERANK_CACHE_TTL", "86400"))
+)
+
+RERANK_FALLBACKS = Counter("rerank_fallbacks_total", "Reranks that kept first-stage order, by reason")
+
+reranker_state = {"model": None}
+_load_lock = threading.Lock()
+
+def load_reranker():
+    with _load_lock:
+        if reranker_state["model"] is None:
+            from sentence_transformers import CrossEncoder  # Pulls in PyTorch, only when reranking
+            reranker_state["model"] = CrossEncoder(RERANK_MODEL, max_length=256)
+    return reranker_state["model"]
+
+def warm_up_reranker():
+    # Kept apart from loading: the first call starts torch's thread pool,
+    # which must happen after gunicorn forks its workers
+    load_reranker().predict([("warm up", "warm up")])  # First call pays for lazy torch init
+
+def rerank_cache_key(query: str, metadata: dict) -> tuple:
+    # The document hash changes whenever the assessment text does, so a catalog
+    # refresh never reuses a score computed against the old description
+    query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()[:16]
+    return (RERANK_MODEL, query_hash, metadata.get("document_hash") or metadata["url"])
+
+def build_passage(metadata: dict) -> str:
+    return f"{metadata['name']}: {metadata['description']}"
+
+def score_candidates(queries: List[str], candidates: List[List[dict]]) -> List[List[float]]:
+    """Relevance in [0, 1] for every (query, candidate metadata) pair, cached per pair."""
+    keys = [[rerank_cache_key(query, metadata) for metadata in metadatas] for query, metadatas in zip(queries, candidates)]
+    scores = [[rerank_cache.get(key) for key in row] for row in keys]
+    missing = [(q, i) for q, row in enumerate(scores) for i, score in enumerate(row) if score is None]
+    if missing:
+        # Every uncached pair across all queries goes through one predict call
+        logits = load_reranker().predict(
+            [(queries[q], build_passage(candidates[q][i])) for q, i in missing],
+            batch_size=RERANK_BATCH_SIZE
+        )
+        for (q, i), logit in zip(missing, np.asarray(logits, dtype=np.float32)):
+            scores[q][i] = float(1 / (1 + np.exp(-logit)))
+            rerank_cache.set(keys[q][i], scores[q][i])
+    return scores
+
+def rerank(queries: List[str], candidates: List[List[dict]]) -> Optional[List[List[float]]]:
+    """Cross-encoder scores, or None when they can't be had within RERANK_BUDGET."""
+    if not queries:
+        return []
+
+    future = rerank_executor.submit(score_candidates, queries, candidates)
+    try:
+        return future.result(timeout=RERANK_BUDGET)
+    except TimeoutError:
+        # A started batch keeps running and fills the cache for the next
+        # request; one still queued is dropped
+        future.cancel()
+        RERANK_FALLBACKS.inc(reason="timeout")
+        print(f"⚠️ Rerank exceeded {RERANK_BUDGET * 1000:.0f} ms, keeping first-stage order")
+    except Exception as e:
+        RERANK_FALLBACKS.inc(reason="error")
+        print(f"⚠️ Rerank failed, keeping first-stage order: {str(e)}")
+    return None
@@ -1,268 +1,496 @@
+import hashlib
 import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup, Tag
 import requests
-from urllib.parse import urljoin
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urljoin, urlsplit
 import warnings
 warnings.filterwarnings("ignore")
 
+from app.cache import DiskCache
+
+BASE_URL = "https://www.shl.com"
+
+# All 32 tab URLs exactly as provided
+CATALOG_URLS = [
+    "https://www.shl.com/solutions/products/product-catalog/",
+    "https://www.shl.com/solutions/products/product-catalog/?start=12&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=24&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=36&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=48&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=60&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=72&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=84&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=96&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=108&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=120&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=132&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=144&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=156&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=168&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=180&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=192&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=204&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=216&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=228&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=240&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=252&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=264&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=276&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=288&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=300&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=312&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=324&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=336&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=348&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=360&type=1&type=1",
+    "https://www.shl.com/solutions/products/product-catalog/?start=372&type=1&type=1"
+]
+OUTPUT_PATH = os.path.join("data", "shl_assessments_complete.json")
+CHECKPOINT_PATH = os.path.join("data", "scrape_checkpoint.jsonl")
+HTTP_CACHE_PATH = os.path.join("data", "scrape_http_cache.sqlite3")
+
+# Bump whenever parsing changes so cached parse results are not reused
+PARSER_VERSION = "2"
+
+# lxml builds the tree several times faster than the pure-Python html.parser
+HTML_PARSER = "lxml"
+
+# Detail fields filled in from an assessment page, with their fallbacks
+DETAIL_DEFAULTS = {
+    "description": "Description unavailable",
+    "duration": "Duration not specified",
+    "languages": [],
+    "job_level": "Level not specified",
+    "remote_testing": "Remote testing not specified",
+    "test_type": "Type not specified"
+}
+
+# Crawl tuning: worker threads, minimum gap between two requests to the same
+# host (politeness), and retry attempts for transient HTTP failures
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "4"))
+SCRAPER_MIN_INTERVAL = float(os.getenv("SCRAPER_MIN_INTERVAL", "0.5"))
+SCRAPER_RETRIES = int(os.getenv("SCRAPER_RETRIES", "3"))
+
+
+class HostRateLimiter:
+    """Spaces out requests so each host sees at most one every ``min_interval`` seconds."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CrawlStats:
+    """Page outcome counts (parsed, unchanged, not_modified) shared by the crawl workers."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, outcome: str):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def __getitem__(self, outcome: str) -> int:
+        with self._lock:
+            return self._counts[outcome]
+
+
+class Checkpoint:
+    """Append-only JSONL log of finished URLs, so an interrupted crawl can resume."""
+
+    def __init__(self, path: str, resume: bool = True):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = {}
+        if resume and os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line from a crash
+                    self.done[entry["url"]] = entry["data"]
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def record(self, url: str, data):
+        with self._lock:
+            self.done[url] = data
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"url": url, "data": data}) + "\n")
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def create_session(pool_size: int = SCRAPER_WORKERS, retries: int = SCRAPER_RETRIES) -> requests.Session:
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'Mozilla/5.0'})
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_parsed(session: requests.Session, limiter: HostRateLimiter, http_cache: DiskCache,
+                 url: str, timeout: float, parse, stats: CrawlStats):
+    """Fetch ``url`` and return ``parse(html)``, skipping work whenever the page is unchanged.
+
+    The cache keeps the validators, a hash of the body and the parse result for
+    each URL. A 304, or a 200 whose body hashes the same as last time, reuses
+    the stored result without touching BeautifulSoup. Error statuses raise
+    instead of being parsed, so an error page is never cached or
+    checkpointed as catalog data.
+    """
+    cached = http_cache.get(url) if http_cache is not None else None
+    if cached and cached.get("parser_version") != PARSER_VERSION:
+        cached = None
+
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    limiter.wait(url)
+    response = session.get(url, timeout=timeout, headers=headers)
+    if response.status_code == 304 and cached:
+        stats.inc("not_modified")
+        return cached["data"]
+    response.raise_for_status()
+
+    body_hash = hashlib.sha256(response.content).hexdigest()
+    if cached and cached["body_hash"] == body_hash:
+        stats.inc("unchanged")
+        data = cached["data"]
+    else:
+        stats.inc("parsed")
+        data = parse(response.text)
+
+    if http_cache is not None:
+        http_cache.set(url, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body_hash": body_hash,
+            "parser_version": PARSER_VERSION,
+            "data": data
+        })
+    return data
+
+
+def parse_catalog_rows(html: str, base_url: str = BASE_URL) -> list:
+    """Pull name, detail URL and adaptive/IRT support for each row of a catalog tab."""
+    catalog_soup = BeautifulSoup(html, 'html.parser')
+    rows = catalog_soup.select("table tr")[1:]  # Skip header row
+    entries = []
+
+    for row in rows:
+        cols = row.select("td")
+        if not cols:
+            continue
+
+        link = cols[0].find("a")
+        if not link:
+            continue
+
+        # Check for adaptive/IRT support from catalog table
+        adaptive_support = "❓"
+        adaptive_cell = row.select_one("td.adaptive-support") or row.select_one("td:nth-child(3)")
+        if adaptive_cell:
+            # Look for green dot or indicator
+            green_dot = adaptive_cell.select_one('svg.green, span.green-circle, .green-dot')
+            if green_dot or ("green" in str(adaptive_cell).lower()):
+                adaptive_support = "🟢"  # Green circle emoji
+            else:
+                adaptive_support = "🔴"  # Red circle emoji
+
+        # Alternative check for text that might indicate support
+        adaptive_text = row.find(string=lambda x: x and "Adaptive" in x or "IRT" in x)
+        if adaptive_text and adaptive_support == "❓":
+            parent_element = adaptive_text.parent
+            if "supported" in str(parent_element).lower() or "yes" in str(parent_element).lower():
+                adaptive_support = "🟢"
+            elif "not supported" in str(parent_element).lower() or "no" in str(parent_element).lower():
+                adaptive_support = "🔴"
+
+        # Clean URL
+        assessment_url = urljoin(base_url, link["href"].strip())
+        if "solutions/products/product-catalog/solutions/products" in assessment_url:
+            assessment_url = assessment_url.replace(
+                "solutions/products/product-catalog/solutions/products",
+                "solutions/products"
+            )
+
+        entries.append({
+            "name": link.get_text(strip=True),
+            "url": assessment_url,
+            "adaptive/irt_support": adaptive_support
+        })
+
+    return entries
+
+
+def parse_assessment_page(html: str, assessment_data: dict) -> dict:
+    """Fill in the detail fields of ``assessment_data`` from an assessment page.
+
+    The tree is built with lxml and walked once to collect every anchor the
+    extraction needs (headings, paragraphs, the Description container and the
+    "Remote Testing:" / "Test Type:" labels); each field is then read from
+    those anchors instead of re-scanning the whole document.
+    """
+    assessment_soup = BeautifulSoup(html, HTML_PARSER)
+
+    description_heading = None
+    description_by_id = None
+    description_by_class = None
+    headings = []
+    paragraphs = []
+    remote_testing_text = None
+    test_type_element = None
+
+    for node in assessment_soup.descendants:
+        if isinstance(node, Tag):
+            if node.name in ('h1', 'h2', 'h3', 'h4'):
+                if description_heading is None and node.text.strip() == "Description":
+                    description_heading = node
+                if node.name != 'h1':
+                    headings.append(node)
+            elif node.name == 'p':
+                paragraphs.append(node)
+            if description_by_id is None and node.get('id') == "Description":
+                description_by_id = node
+            if description_by_class is None and "Description" in node.get('class', []):
+                description_by_class = node
+        elif remote_testing_text is None or test_type_element is None:
+            if remote_testing_text is None and "Remote Testing:" in node:
+                remote_testing_text = node
+            if test_type_element is None and "Test Type:" in node:
+                test_type_element = node
+
+    # DESCRIPTION SCRAPING
+    description = ""
+
+    # Method 1: Try finding the description under a heading element
+    if description_heading:
+        next_element = description_heading.find_next()
+        while next_element and next_element.name == 'p':
+            description += next_element.get_text(" ", strip=True) + " "
+            next_element = next_element.find_next()
+
+    # Method 2: Look for a specific container with Description class or id
+    if not description:
+        description_div = description_by_id or description_by_class
+        if description_div:
+            description = " ".join([p.get_text(" ", strip=True) for p in description_div.find_all('p')])
+
+    # Method 3: Try direct CSS classes that might contain the description
+    if not description:
+        for selector in ["div.product-details p", "div.product-description p", "div.description-content p",
+                         "section.description p", ".product-info .description"]:
+            container = assessment_soup.select_one(selector)
+            if container:
+                description = container.get_text(" ", strip=True)
+                break
+
+    # Method 4: Look for any paragraph that contains characteristic keywords
+    if not description or description == "We recommend upgrading to a modern browser.":
+        keywords = ["entry-level", "position", "candidate", "assessment", "measure", "skill", "solution is for"]
+        for p in paragraphs:
+            text = p.get_text(" ", strip=True)
+            if any(keyword in text.lower() for keyword in keywords) and len(text) > 50:
+                description = text
+                break
+
+    # Final cleanup
+    if description and description != "We recommend upgrading to a modern browser.":
+        unwanted_keywords = ["Contact", "Practice Tests", "Support", "Login", "Buy Online", "Book a Demo"]
+        for keyword in unwanted_keywords:
+            description = description.replace(keyword, "")
+        assessment_data["description"] = description.strip()
+
+    # NEW FIELDS SCRAPING
+
+    # 1. Headings followed by the duration, languages and job level values
+    for heading in headings:
+        heading_text = heading.get_text(strip=True).lower()
+        next_sibling = heading.find_next_sibling()
+
+        # Duration
+        if 'assessment length' in heading_text or 'duration' in heading_text:
+            duration_text = next_sibling.get_text(strip=True) if next_sibling else ""
+            if 'minutes' in duration_text.lower():
+                assessment_data["duration"] = duration_text
+
+        # Languages
+        elif 'languages' in heading_text:
+            languages_text = next_sibling.get_text(strip=True) if next_sibling else ""
+            assessment_data["languages"] = [lang.strip() for lang in languages_text.split(',') if lang.strip()]
+
+        # Job Level
+        elif 'job levels' in heading_text or 'job level' in heading_text:
+            job_level_text = next_sibling.get_text(strip=True) if next_sibling else ""
+            assessment_data["job_level"] = job_level_text
+
+    # Remote testing and test type have always only been read on pages that
+    # have at least one h2-h4 heading; keep that behaviour
+    if not headings:
+        return assessment_data
+
+    # 2. For Remote Testing (green dot)
+    if remote_testing_text:
+        parent_element = remote_testing_text.parent
+
+        # Try looking for a circle element after the text
+        green_dot = parent_element.find_next('svg') or parent_element.find_next('span', class_=lambda x: x and ('circle' in x or 'dot' in x))
+
+        # If not found, try looking for any element with green color
+        if not green_dot:
+            green_dot = parent_element.find_next(attrs={'style': lambda x: x and 'green' in x.lower()})
+
+        # If not found, try looking for elements with specific classes
+        if not green_dot:
+            green_dot = assessment_soup.select_one('span.green-circle, circle.green, .green-dot, .status-green')
+
+        # Check if anything green was found
+        assessment_data["remote_testing"] = "🟢" if green_dot else "🔴"
+    else:
+        assessment_data["remote_testing"] = "❓"  # Question mark if section not found
+
+    # 3. For Test Type (A B P format)
+    if test_type_element:
+        # Look for the subsequent elements containing the test type letters
+        test_type_container = test_type_element.parent.find_next('span') or test_type_element.find_next_sibling()
+        if test_type_container:
+            assessment_data["test_type"] = test_type_container.get_text(strip=True)
+        else:
+            # Alternative approach - get all letters that follow the "Test Type:" text
+            next_element = test_type_element.next_sibling
+            test_type_letters = []
+            while next_element and not isinstance(next_element, Tag) and not "Remote Testing" in str(next_element):
+                if next_element.strip():
+                    test_type_letters.append(next_element.strip())
+                next_element = next_element.next_sibling
+            assessment_data["test_type"] = " ".join(test_type_letters) if test_type_letters else "Not found"
+
+    return assessment_data
+
+
+def scrape_shl_catalog(base_url: str = BASE_URL, output_path: str = OUTPUT_PATH,
+                       checkpoint_path: str = CHECKPOINT_PATH, workers: int = SCRAPER_WORKERS,
+                       min_interval: float = SCRAPER_MIN_INTERVAL, resume: bool = True,
+                       http_cache_path: str = HTTP_CACHE_PATH):
+    # Tabs are rebased onto base_url so the crawl can run against a local fixture server
+    catalog_urls = [urljoin(base_url, urlsplit(url)._replace(scheme="", netloc="").geturl()) for url in CATALOG_URLS]
+
+    session = create_session(pool_size=workers)
+    limiter = HostRateLimiter(min_interval)
+    checkpoint = Checkpoint(checkpoint_path, resume=resume)
+    http_cache = DiskCache(http_cache_path, max_entries=20000) if http_cache_path else None
+    stats = CrawlStats()
+    if checkpoint.done:
+        print(f"⏩ Resuming crawl, {len(checkpoint.done)} URLs already done")
+
+    def scrape_tab(catalog_url: str) -> list:
+        if catalog_url in checkpoint.done:
+            return checkpoint.done[catalog_url]
+        entries = fetch_parsed(
+            session, limiter, http_cache, catalog_url, timeout=15,
+            parse=lambda html: parse_catalog_rows(html, base_url), stats=stats
+        )
+        checkpoint.record(catalog_url, entries)
+        return entries
+
+    def scrape_assessment(entry: dict, tab_num: int) -> dict:
+        assessment_url = entry["url"]
+        if assessment_url in checkpoint.done:
+            return checkpoint.done[assessment_url]
 
-def scrape_shl_catalog():
-    BASE_URL = "https://www.shl.com"
-    
-    # All 32 tab URLs exactly as provided
-    CATALOG_URLS = [
-        "https://www.shl.com/solutions/products/product-catalog/",
-        "https://www.shl.com/solutions/products/product-catalog/?start=12&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=24&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=36&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=48&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=60&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=72&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=84&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=96&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=108&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=120&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=132&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=144&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=156&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=168&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=180&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=192&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=204&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=216&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=228&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=240&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=252&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=264&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=276&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=288&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=300&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=312&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=324&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=336&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=348&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=360&type=1&type=1",
-        "https://www.shl.com/solutions/products/product-catalog/?start=372&type=1&type=1"
-    ]
-    
-    assessments = []
-    
-    for tab_num, CATALOG_URL in enumerate(CATALOG_URLS, 1):
         try:
-            print(f"\n🔄 Fetching Tab {tab_num}... ({CATALOG_URL})")
-            catalog_response = requests.get(CATALOG_URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=15)
-            catalog_response.raise_for_status()
-            catalog_soup = BeautifulSoup(catalog_response.text, 'html.parser')
-            
-            rows = catalog_soup.select("table tr")[1:]  # Skip header row
-            print(f"🔍 Found {len(rows)} assessments in Tab {tab_num}")
-            
-            for i, row in enumerate(rows, 1):
-                cols = row.select("td")
-                if not cols:
-                    continue
-                    
-                link = cols[0].find("a")
-                if not link:
-                    continue
-                
-                # Check for adaptive/IRT support from catalog table
-                adaptive_support = "❓"
-                adaptive_cell = row.select_one("td.adaptive-support") or row.select_one("td:nth-child(3)")
-                if adaptive_cell:
-                    # Look for green dot or indicator
-                    green_dot = adaptive_cell.select_one('svg.green, span.green-circle, .green-dot')
-                    if green_dot or ("green" in str(adaptive_cell).lower()):
-                        adaptive_support = "🟢"  # Green circle emoji
-                    else:
-                        adaptive_support = "🔴"  # Red circle emoji
-    
-                # Alternative check for text that might indicate support
-                adaptive_text = row.find(string=lambda x: x and "Adaptive" in x or "IRT" in x)
-                if adaptive_text and adaptive_support == "❓":
-                    parent_element = adaptive_text.parent
-                    if "supported" in str(parent_element).lower() or "yes" in str(parent_element).lower():
-                        adaptive_support = "🟢"
-                    elif "not supported" in str(parent_element).lower() or "no" in str(parent_element).lower():
-                        adaptive_support = "🔴"
-            
-                # Clean URL
-                assessment_url = urljoin(BASE_URL, link["href"].strip())
-                if "solutions/products/product-catalog/solutions/products" in assessment_url:
-                    assessment_url = assessment_url.replace(
-                        "solutions/products/product-catalog/solutions/products",
-                        "solutions/products"
-                    )
-                
-                try:
-                    print(f"📄 Tab {tab_num}: Fetching ({i}/{len(rows)}) {assessment_url}")
-                    assessment_response = requests.get(
-                        assessment_url, 
-                        headers={'User-Agent': 'Mozilla/5.0'}, 
-                        timeout=10
-                    )
-                    assessment_soup = BeautifulSoup(assessment_response.text, 'html.parser')
-                    
-                    # Initialize all fields with default values
-                    assessment_data = {
-                        "name": link.get_text(strip=True),
-                        "url": assessment_url,
-                        "adaptive/irt_support": adaptive_support,
-                        "description": "Description unavailable",
-                        "duration": "Duration not specified",
-                        "languages": [],
-                        "job_level": "Level not specified",
-                        "remote_testing": "Remote testing not specified",
-                        "test_type": "Type not specified",
-                        "source_tab": tab_num
-                    }
-                    
-                    # DESCRIPTION SCRAPING
-                    description = ""
-                    
-                    # Method 1: Try finding the description under a heading element
-                    description_heading = assessment_soup.find(lambda tag: tag.name in ['h1', 'h2', 'h3', 'h4'] 
-                                                   and tag.text.strip() == "Description")
-                    if description_heading:
-                        next_element = description_heading.find_next()
-                        while next_element and next_element.name == 'p':
-                            description += next_element.get_text(" ", strip=True) + " "
-                            next_element = next_element.find_next()
-                    
-                    # Method 2: Look for a specific container with Description class or id
-                    if not description:
-                        description_div = assessment_soup.find(id="Description") or assessment_soup.find(class_="Description")
-                        if description_div:
-                            paragraphs = description_div.find_all('p')
-                            description = " ".join([p.get_text(" ", strip=True) for p in paragraphs])
-                    
-                    # Method 3: Try direct CSS classes that might contain the description
-                    if not description:
-                        possible_containers = [
-                            assessment_soup.select_one("div.product-details p"),
-                            assessment_soup.select_one("div.product-description p"),
-                            assessment_soup.select_one("div.description-content p"),
-                            assessment_soup.select_one("section.description p"),
-                            assessment_soup.select_one(".product-info .description")
-                        ]
-                        
-                        for container in possible_containers:
-                            if container:
-                                description = container.get_text(" ", strip=True)
-                                break
-                    
-                    # Method 4: Look for any paragraph that contains characteristic keywords
-                    if not description or description == "We recommend upgrading to a modern browser.":
-                        keywords = ["entry-level", "position", "candidate", "assessment", "measure", "skill", "solution is for"]
-                        paragraphs = assessment_soup.find_all("p")
-                        for p in paragraphs:
-                            text = p.get_text(" ", strip=True)
-                            if any(keyword in text.lower() for keyword in keywords) and len(text) > 50:
-                                description = text
-                                break
-                    
-                    # Final cleanup
-                    if description and description != "We recommend upgrading to a modern browser.":
-                        unwanted_keywords = ["Contact", "Practice Tests", "Support", "Login", "Buy Online", "Book a Demo"]
-                        for keyword in unwanted_keywords:
-                            description = description.replace(keyword, "")
-                        assessment_data["description"] = description.strip()
-                    
-                    # NEW FIELDS SCRAPING
-                    
-                    # 1. Find all specification sections
-                    spec_sections = assessment_soup.find_all(lambda tag: tag.name in ['div', 'section'] and 
-                                                           'specification' in ' '.join(tag.get('class', [])).lower())
-                    
-                    # 2. Alternative: Look for headings that might contain these fields
-                    for heading in assessment_soup.find_all(['h2', 'h3', 'h4']):
-                        heading_text = heading.get_text(strip=True).lower()
-                        next_sibling = heading.find_next_sibling()
-                        
-                        # Duration
-                        if 'assessment length' in heading_text or 'duration' in heading_text:
-                            duration_text = next_sibling.get_text(strip=True) if next_sibling else ""
-                            if 'minutes' in duration_text.lower():
-                                assessment_data["duration"] = duration_text
-                        
-                        # Languages
-                        elif 'languages' in heading_text:
-                            languages_text = next_sibling.get_text(strip=True) if next_sibling else ""
-                            assessment_data["languages"] = [lang.strip() for lang in languages_text.split(',') if lang.strip()]
-                        
-                        # Job Level
-                        elif 'job levels' in heading_text or 'job level' in heading_text:
-                            job_level_text = next_sibling.get_text(strip=True) if next_sibling else ""
-                            assessment_data["job_level"] = job_level_text
-                        
-                        # 3. For Remote Testing (green dot)
-                        remote_testing_text = assessment_soup.find(string=lambda x: x and "Remote Testing:" in x)
-                        if remote_testing_text:
-                            parent_element = remote_testing_text.parent
-                            green_dot = None
-                            
-                            # Try looking for a circle element after the text
-                            green_dot = parent_element.find_next('svg') or parent_element.find_next('span', class_=lambda x: x and ('circle' in x or 'dot' in x))
-                            
-                            # If not found, try looking for any element with green color
-                            if not green_dot:
-                                green_dot = parent_element.find_next(attrs={'style': lambda x: x and 'green' in x.lower()})
-                            
-                            # If not found, try looking for elements with specific classes
-                            if not green_dot:
-                                green_dot = assessment_soup.select_one('span.green-circle, circle.green, .green-dot, .status-green')
-                            
-                            # Check if anything green was found
-                            if green_dot:
-                                assessment_data["remote_testing"] = "🟢"  # Green circle emoji
-                            else:
-                                assessment_data["remote_testing"] = "🔴"  # Red circle emoji
-                        else:
-                            assessment_data["remote_testing"] = "❓"  # Question mark if section not found
-
-                        # 4. For Test Type (A B P format)
-                        test_type_element = assessment_soup.find(string=lambda x: "Test Type:" in x if x else False)
-                        if test_type_element:
-                            # Look for the subsequent elements containing the test type letters
-                            test_type_container = test_type_element.parent.find_next('span') or test_type_element.find_next_sibling()
-                            if test_type_container:
-                                test_type_text = test_type_container.get_text(strip=True)
-                                assessment_data["test_type"] = test_type_text
-                            else:
-                                # Alternative approach - get all letters that follow the "Test Type:" text
-                                next_element = test_type_element.next_sibling
-                                test_type_letters = []
-                                while next_element and not isinstance(next_element, Tag) and not "Remote Testing" in str(next_element):
-                                    if next_element.strip():
-                                        test_type_letters.append(next_element.strip())
-                                    next_element = next_element.next_sibling
-                                assessment_data["test_type"] = " ".join(test_type_letters) if test_type_letters else "Not found"
-                    
-                    assessments.append(assessment_data)
-                    time.sleep(1.5)
-                
-                except Exception as e:
-                    print(f"⚠️ Tab {tab_num}: Failed to scrape {assessment_url}: {str(e)}")
-                    assessments.append({
-                        "name": link.get_text(strip=True),
-                        "url": assessment_url,
-                        "description": f"Description unavailable (Error: {str(e)})",
-                        "source_tab": tab_num
-                    })
-            
-            print(f"✅ Tab {tab_num} completed")
-            time.sleep(2)
-            
+            details = fetch_parsed(
+                session, limiter, http_cache, assessment_url, timeout=10,
+                parse=lambda html: parse_assessment_page(html, dict(DETAIL_DEFAULTS)), stats=stats
+            )
         except Exception as e:
-            print(f"❌ Tab {tab_num} failed: {str(e)}")
-            continue
-    
-    with open("data/shl_assessments_complete.json", "w") as f:
+            # Failures are not checkpointed, so a resumed crawl retries them
+            print(f"⚠️ Tab {tab_num}: Failed to scrape {assessment_url}: {str(e)}")
+            return {
+                "name": entry["name"],
+                "url": assessment_url,
+                "description": f"Description unavailable (Error: {str(e)})",
+                "source_tab": tab_num
+            }
+
+        assessment_data = {
+            "name": entry["name"],
+            "url": assessment_url,
+            "adaptive/irt_support": entry["adaptive/irt_support"],
+            **details,
+            "source_tab": tab_num
+        }
+        checkpoint.record(assessment_url, assessment_data)
+        return assessment_data
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        print(f"\n🔄 Fetching {len(catalog_urls)} catalog tabs with {workers} workers...")
+        tab_futures = {executor.submit(scrape_tab, url): tab_num for tab_num, url in enumerate(catalog_urls, 1)}
+        tabs = {}
+        for future in as_completed(tab_futures):
+            tab_num = tab_futures[future]
+            try:
+                tabs[tab_num] = future.result()
+                print(f"🔍 Found {len(tabs[tab_num])} assessments in Tab {tab_num}")
+            except Exception as e:
+                print(f"❌ Tab {tab_num} failed: {str(e)}")
+
+        # Results are slotted back by (tab, row) so the output order matches a sequential crawl
+        detail_futures = {
+            executor.submit(scrape_assessment, entry, tab_num): (tab_num, i)
+            for tab_num, entries in tabs.items()
+            for i, entry in enumerate(entries)
+        }
+        results = {}
+        for done, future in enumerate(as_completed(detail_futures), 1):
+            results[detail_futures[future]] = future.result()
+            if done % 25 == 0 or done == len(detail_futures):
+                print(f"📄 Fetched {done}/{len(detail_futures)} assessment pages")
+
+    assessments = [results[key] for key in sorted(results)]
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
         json.dump(assessments, f, indent=2)
+    checkpoint.clear()
         
-    print(f"\n🚀 TOTAL SCRAPED: {len(assessments)} assessments across {len(CATALOG_URLS)} tabs")
+    print(f"\n🚀 TOTAL SCRAPED: {len(assessments)} assessments across {len(tabs)} of {len(catalog_urls)} tabs")
+    print(f"🗃 Pages: {stats['parsed']} parsed, {stats['unchanged']} unchanged, {stats['not_modified']} not modified (304)")
     return assessments
 
 if __name__ == "__main__":
-    scrape_shl_catalog()
\ No newline at end of file
+    scrape_shl_catalog()
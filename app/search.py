@@ -0,0 +1,357 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import List, Optional
+
+import numpy as np
+
+from app.filters import has_typed_metadata, matches
+
+# Both backends answer with Chroma's query() layout (one list per query text)
+# so the API can switch between them without touching response building.
+
+def matching_rows(metadatas: List[dict], where: Optional[dict], memo: dict) -> Optional[np.ndarray]:
+    """Row indices whose metadata matches ``where`` (None when unfiltered), memoised per clause."""
+    if not where:
+        return None
+    key = json.dumps(where, sort_keys=True)
+    # The memo is shared by concurrent requests and may be cleared by any of
+    # them, so the rows are returned from a local rather than read back
+    rows = memo.get(key)
+    if rows is None:
+        rows = np.array(
+            [j for j, metadata in enumerate(metadatas) if matches(metadata, where)],
+            dtype=np.int64
+        )
+        if len(memo) >= 256:
+            memo.clear()
+        memo[key] = rows
+    return rows
+
+def merge_hits(results: dict, groups: List[List[int]], n_results: int) -> dict:
+    """Max-pool rows of a query() result: one ranking per group of rows.
+
+    Chunk hits are folded into their assessment and each assessment keeps its
+    best (smallest) distance, whichever chunk or query row it came from.
+    """
+    merged = {"ids": [], "metadatas": [], "documents": [], "distances": []}
+    for rows in groups:
+        best = {}
+        for row in rows:
+            for item_id, metadata, document, distance in zip(
+                results["ids"][row], results["metadatas"][row], results["documents"][row], results["distances"][row]
+            ):
+                item_id = metadata.get("assessment_id", item_id)
+                if item_id not in best or distance < best[item_id][2]:
+                    best[item_id] = (metadata, document, distance)
+        top = sorted(best, key=lambda item_id: best[item_id][2])[:n_results]
+        merged["ids"].append(top)
+        merged["metadatas"].append([best[item_id][0] for item_id in top])
+        merged["documents"].append([best[item_id][1] for item_id in top])
+        merged["distances"].append([best[item_id][2] for item_id in top])
+    return merged
+
+
+class ChromaBackend:
+    def __init__(self, collection, version: Optional[str] = None):
+        self.collection = collection
+        self.version = version
+
+    def count(self) -> int:
+        # Rows are chunks; the build records how many assessments they cover
+        return (self.collection.metadata or {}).get("assessments") or self.collection.count()
+
+    def filterable(self) -> bool:
+        # Every build writes the same metadata fields, so one row tells
+        return has_typed_metadata(self.collection.get(limit=1, include=["metadatas"])["metadatas"])
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, where: Optional[dict] = None) -> dict:
+        # Rows are chunks; fetching max_chunks per wanted hit guarantees
+        # n_results distinct assessments survive pooling
+        max_chunks = (self.collection.metadata or {}).get("max_chunks", 1)
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results * max_chunks,
+            where=where,
+            include=["metadatas", "documents", "distances"]
+        )
+        return merge_hits(results, [[row] for row in range(len(query_embeddings))], n_results)
+
+
+class NumpyBackend:
+    """Exact nearest-neighbour search over a memory-mapped float32 matrix.
+
+    Rows are L2-normalised chunk vectors, stored contiguously per assessment,
+    so one matrix product gives cosine similarity for every chunk and a
+    ``maximum.reduceat`` pools them per assessment. Distances are reported as
+    squared L2 (``2 - 2 * cos``) to match Chroma's default space.
+    """
+
+    def __init__(self, embeddings: np.ndarray, records: List[dict], version: Optional[str] = None):
+        chunk_counts = [record.get("chunks", 1) for record in records]
+        if len(embeddings) != sum(chunk_counts):
+            raise ValueError("Embedding matrix and metadata table are out of sync")
+        self.version = version
+        self.embeddings = embeddings
+        self.chunk_offsets = np.cumsum([0] + chunk_counts[:-1], dtype=np.int64)
+        self.records = records  # Lets BM25Index reuse the table instead of loading its own copy
+        self.ids = [record["id"] for record in records]
+        self.documents = [record.get("document") for record in records]
+        self.metadatas = [record["metadata"] for record in records]
+        self._candidates = {}
+
+    @classmethod
+    def load(cls, index_path: str, version: Optional[str] = None) -> "NumpyBackend":
+        embeddings = np.load(os.path.join(index_path, "embeddings.npy"), mmap_mode="r")
+        with open(os.path.join(index_path, "metadata.json"), "r") as f:
+            records = json.load(f)
+        return cls(embeddings, records, version)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def filterable(self) -> bool:
+        return has_typed_metadata(self.metadatas)
+
+    def candidates(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        return matching_rows(self.metadatas, where, self._candidates)
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, where: Optional[dict] = None) -> dict:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        # Top-k is taken over assessments matching the filter only, so it
+        # always returns k hits when k exist
+        rows = self.candidates(where)
+        similarities = queries @ self.embeddings.T
+        if self.ids:
+            similarities = np.maximum.reduceat(similarities, self.chunk_offsets, axis=1)
+        if rows is not None:
+            similarities = similarities[:, rows]
+        k = min(n_results, similarities.shape[1])
+
+        results = {"ids": [], "metadatas": [], "documents": [], "distances": []}
+        for row in similarities:
+            if k == 0:
+                top = np.empty(0, dtype=np.int64)
+            else:
+                top = np.argpartition(-row, k - 1)[:k]
+                top = top[np.argsort(-row[top])]
+            distances = [float(2 - 2 * row[j]) for j in top]
+            if rows is not None:
+                top = rows[top]
+            results["ids"].append([self.ids[j] for j in top])
+            results["metadatas"].append([self.metadatas[j] for j in top])
+            results["documents"].append([self.documents[j] for j in top])
+            results["distances"].append(distances)
+        return results
+
+
+def export_numpy_index(index_path: str, ids: List[str], embeddings, documents: List[str], metadatas: List[dict],
+                       chunk_counts: Optional[List[int]] = None):
+    """Write the catalog chunk vectors and a sidecar metadata table for NumpyBackend.
+
+    ``embeddings`` holds ``chunk_counts[i]`` consecutive rows for assessment ``i``
+    (one row each when omitted).
+    """
+    os.makedirs(index_path, exist_ok=True)
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+    np.save(os.path.join(index_path, "embeddings.npy"), matrix)
+
+    records = [
+        {"id": id_, "document": document, "metadata": metadata, "chunks": chunks}
+        for id_, document, metadata, chunks in zip(ids, documents, metadatas, chunk_counts or [1] * len(ids))
+    ]
+    with open(os.path.join(index_path, "metadata.json"), "w") as f:
+        json.dump(records, f)
+
+
+# Keeps tokens like "c++", "c#", ".net" and "java8" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+
+def tokenize(text: str) -> List[str]:
+    # Adjacent-word bigrams let phrases such as "sql server" or "java 8" outrank
+    # documents that only mention the words separately
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class BM25Index:
+    """Okapi BM25 over the same documents as the vector index.
+
+    Each posting's term weight is computed once at load time, so scoring a
+    query is one indexed addition per query term.
+    """
+
+    def __init__(self, records: List[dict], postings: dict, doc_lengths: List[int],
+                 k1: float = 1.5, b: float = 0.75, version: Optional[str] = None):
+        if len(records) != len(doc_lengths):
+            raise ValueError("BM25 index and metadata table are out of sync")
+        self.version = version
+        self.ids = [record["id"] for record in records]
+        self.documents = [record.get("document") for record in records]
+        self.metadatas = [record["metadata"] for record in records]
+        self._candidates = {}
+
+        lengths = np.asarray(doc_lengths, dtype=np.float32)
+        norms = k1 * (1 - b + b * lengths / max(float(lengths.mean()), 1.0)) if len(lengths) else lengths
+        self.postings = {}
+        for term, entries in postings.items():
+            rows = np.array([row for row, _ in entries], dtype=np.int64)
+            tfs = np.array([tf for _, tf in entries], dtype=np.float32)
+            idf = math.log(1 + (len(lengths) - len(rows) + 0.5) / (len(rows) + 0.5))
+            self.postings[term] = (rows, idf * tfs * (k1 + 1) / (tfs + norms[rows]))
+
+    @classmethod
+    def load(cls, index_path: str, version: Optional[str] = None,
+             records: Optional[List[dict]] = None) -> "BM25Index":
+        """Load bm25.json; ``records`` reuses a metadata table that is already in memory."""
+        with open(os.path.join(index_path, "bm25.json"), "r") as f:
+            index = json.load(f)
+        if records is None:
+            with open(os.path.join(index_path, "metadata.json"), "r") as f:
+                records = json.load(f)
+        return cls(records, index["postings"], index["doc_lengths"], index["k1"], index["b"], version)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def query(self, query_texts: List[str], n_results: int = 10, where: Optional[dict] = None) -> dict:
+        """Top documents per text by BM25 score; documents sharing no term are left out."""
+        rows = matching_rows(self.metadatas, where, self._candidates)
+        results = {"ids": [], "metadatas": [], "documents": [], "scores": []}
+        for text in query_texts:
+            scores = np.zeros(len(self.ids), dtype=np.float32)
+            for term in set(tokenize(text)):
+                if term in self.postings:
+                    term_rows, weights = self.postings[term]
+                    scores[term_rows] += weights
+
+            hits = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+            if len(hits) > n_results:
+                hits = hits[np.argpartition(-scores[hits], n_results - 1)[:n_results]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            results["ids"].append([self.ids[j] for j in hits])
+            results["metadatas"].append([self.metadatas[j] for j in hits])
+            results["documents"].append([self.documents[j] for j in hits])
+            results["scores"].append([float(scores[j]) for j in hits])
+        return results
+
+
+def export_bm25_index(index_path: str, documents: List[str], k1: float = 1.5, b: float = 0.75):
+    """Write term postings for BM25Index; rows line up with the metadata.json sidecar."""
+    os.makedirs(index_path, exist_ok=True)
+    postings = {}
+    doc_lengths = []
+    for row, document in enumerate(documents):
+        terms = Counter(tokenize(document))
+        doc_lengths.append(sum(terms.values()))
+        for term, tf in terms.items():
+            postings.setdefault(term, []).append([row, tf])
+    with open(os.path.join(index_path, "bm25.json"), "w") as f:
+        json.dump({"k1": k1, "b": b, "doc_lengths": doc_lengths, "postings": postings}, f)
+
+
+class SimilarIndex:
+    """Precomputed nearest catalog neighbours of every assessment.
+
+    Built at index time by ``export_similar_index`` as two memory-mapped
+    ``(assessments x top_n)`` arrays, so an unfiltered lookup reads one row.
+    Filters are applied to the stored ``top_n`` neighbours; when those hold
+    too few matches, the lookup falls back to an exact filtered search over
+    the catalog vectors, so matching assessments are never missed. Results
+    carry distances (squared L2) like the backends.
+    """
+
+    def __init__(self, vectors: NumpyBackend, neighbour_rows: np.ndarray, neighbour_similarities: np.ndarray):
+        if len(vectors.ids) != len(neighbour_rows) or neighbour_rows.shape != neighbour_similarities.shape:
+            raise ValueError("Neighbour table and metadata table are out of sync")
+        self.vectors = vectors
+        self.version = vectors.version
+        self.rows = {item_id: row for row, item_id in enumerate(vectors.ids)}
+        self.neighbour_rows = neighbour_rows
+        self.neighbour_similarities = neighbour_similarities
+
+    @classmethod
+    def load(cls, index_path: str, version: Optional[str] = None,
+             vectors: Optional[NumpyBackend] = None) -> "SimilarIndex":
+        """Memory-map the neighbour table; pass ``vectors`` to share an already loaded NumpyBackend."""
+        neighbour_rows = np.load(os.path.join(index_path, "similar_rows.npy"), mmap_mode="r")
+        neighbour_similarities = np.load(os.path.join(index_path, "similar_similarities.npy"), mmap_mode="r")
+        return cls(vectors or NumpyBackend.load(index_path, version), neighbour_rows, neighbour_similarities)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.rows
+
+    def query(self, item_id: str, n_results: int = 10, where: Optional[dict] = None) -> dict:
+        """Most similar assessments to ``item_id`` that match ``where``, as a one-query result."""
+        row = self.rows[item_id]
+        stored = list(zip(self.neighbour_rows[row].tolist(), self.neighbour_similarities[row].tolist()))
+        hits = [(j, similarity) for j, similarity in stored if matches(self.vectors.metadatas[j], where)][:n_results]
+        if len(hits) < n_results and len(stored) < len(self.rows) - 1:
+            # The table was cut at top_n, so more matches may exist further out
+            return self.search(row, n_results, where)
+
+        vectors = self.vectors
+        return {
+            "ids": [[vectors.ids[j] for j, _ in hits]],
+            "metadatas": [[vectors.metadatas[j] for j, _ in hits]],
+            "documents": [[vectors.documents[j] for j, _ in hits]],
+            "distances": [[2 - 2 * similarity for _, similarity in hits]]
+        }
+
+    def search(self, row: int, n_results: int, where: Optional[dict]) -> dict:
+        """Exact filtered neighbours of one assessment: its chunks queried against every chunk."""
+        vectors = self.vectors
+        start = vectors.chunk_offsets[row]
+        end = vectors.chunk_offsets[row + 1] if row + 1 < len(vectors.ids) else len(vectors.embeddings)
+        chunk_rows = [list(range(end - start))]
+        # One extra hit in case the assessment itself matches the filter
+        results = merge_hits(vectors.query(vectors.embeddings[start:end], n_results + 1, where), chunk_rows, n_results + 1)
+        keep = [i for i, item_id in enumerate(results["ids"][0]) if item_id != vectors.ids[row]][:n_results]
+        return {field: [[values[0][i] for i in keep]] for field, values in results.items()}
+
+
+def export_similar_index(index_path: str, embeddings, chunk_counts: Optional[List[int]] = None,
+                         top_n: int = 50, block_size: int = 256):
+    """Write the ``top_n`` nearest assessments of every assessment for SimilarIndex.
+
+    Two assessments are as similar as their best-matching pair of chunks, the
+    same pooling a query gets. Rows line up with the metadata.json sidecar and
+    hold neighbour row numbers (``similar_rows.npy``) and their cosine
+    similarities (``similar_similarities.npy``), best first. The chunk
+    similarity matrix is built ``block_size`` assessments at a time.
+    """
+    os.makedirs(index_path, exist_ok=True)
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+
+    chunk_counts = chunk_counts or [1] * len(matrix)
+    offsets = np.cumsum([0] + chunk_counts[:-1], dtype=np.int64)
+    ends = offsets + np.asarray(chunk_counts, dtype=np.int64)
+    top_n = max(0, min(top_n, len(chunk_counts) - 1))
+
+    neighbour_rows = np.zeros((len(chunk_counts), top_n), dtype=np.int32)
+    neighbour_similarities = np.zeros((len(chunk_counts), top_n), dtype=np.float32)
+    for start in range(0, len(chunk_counts), block_size):
+        stop = min(start + block_size, len(chunk_counts))
+        block = matrix[offsets[start]:ends[stop - 1]] @ matrix.T
+        similarity = np.maximum.reduceat(block, offsets, axis=1)
+        similarity = np.maximum.reduceat(similarity, offsets[start:stop] - offsets[start], axis=0)
+        similarity[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # Not its own neighbour
+        if top_n == 0:
+            continue
+        top = np.argpartition(-similarity, top_n - 1, axis=1)[:, :top_n]
+        for i, row in enumerate(top):
+            row = row[np.argsort(-similarity[i, row], kind="stable")]
+            neighbour_rows[start + i] = row
+            neighbour_similarities[start + i] = similarity[i, row]
+
+    np.save(os.path.join(index_path, "similar_rows.npy"), neighbour_rows)
+    np.save(os.path.join(index_path, "similar_similarities.npy"), neighbour_similarities)
@@ -0,0 +1,146 @@
+"""Parity, memory and latency check for the int8 ONNX embedding runtime.
+
+Run from the repository root after exporting the model with
+`python -m app.onnx_embedding`:
+
+    python -m benchmarks.bench_embeddings [--k 10] [--min-overlap 0.9]
+
+Each runtime (EMBEDDING_RUNTIME=torch and =onnx) is loaded in its own
+subprocess, so peak RSS and cold start are measured in isolation. Both embed
+the catalog chunks from data/shl_assessments_complete.json and a fixed set of
+job queries. Assessments are ranked the way NumpyBackend ranks them (best
+chunk per assessment), and the mean top-k overlap between the float and int8
+rankings must reach --min-overlap or the script exits non-zero.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+QUERIES = [
+    "Java developer with Spring Boot and microservices experience",
+    "Entry-level customer service representative for a call center",
+    "Senior data scientist skilled in Python, SQL and machine learning",
+    "Sales manager to lead a regional team and grow key accounts",
+    "Graduate financial analyst comfortable with Excel modelling",
+    "Front-end engineer with JavaScript, React and CSS",
+    "Administrative assistant with strong MS Word and typing skills",
+    "Bank cashier handling cash and customer transactions accurately",
+    "Mid-level project manager for agile software delivery",
+    "Mechanical engineer for manufacturing process improvement",
+    "Nurse with patient care and clinical documentation experience",
+    "Retail store supervisor who coaches staff and manages inventory",
+    ".NET developer with C# and SQL Server",
+    "Marketing specialist for digital campaigns and social media",
+    "HR business partner with employee relations experience",
+    "Network administrator for Linux servers and cloud infrastructure",
+    "Executive leader to drive strategy and organisational change",
+    "Warehouse operative with attention to safety procedures",
+    "Accountant with payroll and bookkeeping experience",
+    "QA engineer for manual and automated testing with Selenium",
+]
+
+
+def load_catalog():
+    from app.rag import assessment_chunks
+
+    with open(os.path.join("data", "shl_assessments_complete.json"), "r") as f:
+        assessments = [item for item in json.load(f) if isinstance(item, dict) and "name" in item and "description" in item]
+    chunks = [assessment_chunks(item) for item in assessments]
+    return [chunk for texts in chunks for chunk in texts], [len(texts) for texts in chunks]
+
+
+def run_child(output_dir: str):
+    """Embed everything with the runtime selected by EMBEDDING_RUNTIME and report costs."""
+    start = time.perf_counter()
+    from app.rag import create_embedding_function
+
+    embedding_function = create_embedding_function()
+    embedding_function(["warm up"])
+    load_seconds = time.perf_counter() - start
+
+    documents, _ = load_catalog()
+    start = time.perf_counter()
+    document_embeddings = np.asarray(embedding_function(documents), dtype=np.float32)
+    catalog_seconds = time.perf_counter() - start
+
+    query_embeddings = []
+    start = time.perf_counter()
+    for query in QUERIES:
+        query_embeddings.append(embedding_function([query])[0])
+    query_ms = (time.perf_counter() - start) / len(QUERIES) * 1000
+
+    np.save(os.path.join(output_dir, "documents.npy"), document_embeddings)
+    np.save(os.path.join(output_dir, "queries.npy"), np.asarray(query_embeddings, dtype=np.float32))
+    print(json.dumps({
+        "load_s": load_seconds,
+        "catalog_s": catalog_seconds,
+        "query_ms": query_ms,
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def measure(runtime: str, output_dir: str) -> dict:
+    env = dict(os.environ, EMBEDDING_RUNTIME=runtime)
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_embeddings", "--child", output_dir],
+        env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        print(completed.stderr)
+        sys.exit(f"❌ {runtime} runtime failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def rank(query_embeddings: np.ndarray, document_embeddings: np.ndarray, chunk_counts, k: int) -> np.ndarray:
+    offsets = np.cumsum([0] + chunk_counts[:-1])
+    scores = np.maximum.reduceat(query_embeddings @ document_embeddings.T, offsets, axis=1)
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-overlap", type=float, default=0.9)
+    parser.add_argument("--child", metavar="OUTPUT_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    _, chunk_counts = load_catalog()
+    stats, rankings, vectors = {}, {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for runtime in ("torch", "onnx"):
+            output_dir = os.path.join(tmp, runtime)
+            os.makedirs(output_dir)
+            stats[runtime] = measure(runtime, output_dir)
+            documents = np.load(os.path.join(output_dir, "documents.npy"))
+            queries = np.load(os.path.join(output_dir, "queries.npy"))
+            vectors[runtime] = documents
+            rankings[runtime] = rank(queries, documents, chunk_counts, args.k)
+
+    print(f"{'runtime':<10}{'load s':>10}{'catalog s':>12}{'ms/query':>10}{'RSS MiB':>10}")
+    for runtime, row in stats.items():
+        print(f"{runtime:<10}{row['load_s']:>10.2f}{row['catalog_s']:>12.2f}{row['query_ms']:>10.2f}{row['max_rss_mib']:>10.0f}")
+
+    overlaps = [
+        len(set(torch_top) & set(onnx_top)) / args.k
+        for torch_top, onnx_top in zip(rankings["torch"], rankings["onnx"])
+    ]
+    cosine = float(np.mean(np.sum(vectors["torch"] * vectors["onnx"], axis=1)))
+    print(f"\ntop-{args.k} overlap: mean {np.mean(overlaps):.3f}, min {min(overlaps):.2f}; mean chunk cosine {cosine:.4f}")
+    if np.mean(overlaps) < args.min_overlap:
+        sys.exit(f"❌ int8 rankings drift from the float model (mean overlap < {args.min_overlap})")
+    print("✅ int8 ONNX rankings match the float model")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""LLM round-trips and latency of single vs batched insight prompts.
+
+Run from the repository root (needs the cohere SDK, no API key):
+
+    python -m benchmarks.bench_insights [--k 10] [--latency 0.5] [--per-item 0.1] [--drop-rate 0]
+
+Starts benchmarks/stub_llm.py on a free port, points app.insights at it and
+asks for insights on the first k catalog descriptions once per INSIGHT_MODE,
+each time with an empty cache. Reports Cohere calls and wall time per mode.
+With --drop-rate > 0 the stub leaves sections out of batched answers, which
+shows the per-item fallback at work.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.stub_llm import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--per-item", type=float, default=0.1)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = serve(latency=args.latency, per_item=args.per_item, drop_rate=args.drop_rate)
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "COHERE_API_KEY": "stub",
+        "COHERE_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+        "INSIGHT_CACHE_PATH": os.path.join(tmp, "insights.sqlite3"),
+        "INSIGHT_DEADLINE": "120"
+    })
+    from app import insights
+    from app.cache import DiskCache
+
+    with open(os.path.join("data", "shl_assessments_complete.json"), "r") as f:
+        descriptions = list(dict.fromkeys(item["description"] for item in json.load(f) if item.get("description")))[:args.k]
+
+    print(f"{'mode':<10}{'calls':>8}{'seconds':>10}{'placeholders':>14}")
+    for mode in ("single", "batched"):
+        insights.INSIGHT_MODE = mode
+        insights.insight_cache = DiskCache(os.path.join(tmp, f"{mode}.sqlite3"))
+        calls_before = server.llm.stats()["calls"]
+
+        start = time.perf_counter()
+        results = asyncio.run(insights.gather_insights(descriptions))
+        elapsed = time.perf_counter() - start
+
+        calls = server.llm.stats()["calls"] - calls_before
+        unavailable = sum(1 for insight in results if insight.startswith("AI insights unavailable"))
+        print(f"{mode:<10}{calls:>8}{elapsed:>10.2f}{unavailable:>14}")
+        if unavailable:
+            server.shutdown()
+            sys.exit(f"❌ {mode} mode returned {unavailable} placeholders")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Throughput, per-stage latency and ranking quality of the recommend API.
+
+Run from the repository root after building the index with `python -m app.rag`:
+
+    python -m benchmarks.bench_load [--requests 200] [--concurrency 8] [--use-ai]
+        [--mode semantic|hybrid] [--rerank] [--cold] [--k 10] [--min-recall 0] [--output run.json]
+
+The FastAPI app is driven in-process through httpx's ASGI transport (startup
+and shutdown included), so no server or port is involved, and Cohere is
+replaced by benchmarks/stub_llm.py. The configuration under test comes from
+the usual environment variables (SEARCH_BACKEND, EMBEDDING_RUNTIME,
+SEARCH_MODE, ...), so two runs compare e.g. the chroma and numpy backends.
+
+Relevance: each query in benchmarks/fixtures/labelled_queries.json is asked
+once without insights. recall@k is the share of its labelled assessments in
+the top k, MRR the mean reciprocal rank of the first labelled one.
+
+Load: the same query texts are replayed round-robin, --requests in total with
+--concurrency in flight. Stage durations are read from each response's
+Server-Timing header and reported as p50/p95/p99. Replays hit the query
+caches after the first round; --cold disables them (QUERY_CACHE_SIZE=0) so
+every request pays for embed and search.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stub_llm import serve
+
+LABELLED_QUERIES = os.path.join("benchmarks", "fixtures", "labelled_queries.json")
+
+
+def parse_server_timing(header: str) -> dict:
+    timings = {}
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, _, duration = entry.partition(";dur=")
+        timings[name] = float(duration) / 1000
+    return timings
+
+
+def relevance(rankings, labelled, k: int) -> dict:
+    recalls, reciprocal_ranks = [], []
+    for recommendations, query in zip(rankings, labelled):
+        names = [item["name"] for item in recommendations]
+        relevant = set(query["relevant"])
+        recalls.append(len(relevant & set(names[:k])) / len(relevant))
+        first = next((rank for rank, name in enumerate(names, 1) if name in relevant), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+    return {f"recall@{k}": float(np.mean(recalls)), "mrr": float(np.mean(reciprocal_ranks))}
+
+
+async def replay(client, bodies, total: int, concurrency: int):
+    """Send `total` requests round-robin over `bodies`, `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, errors = [], 0
+
+    async def send(body):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/recommend", json=body)
+            elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            errors += 1
+            return
+        timings = parse_server_timing(response.headers.get("server-timing", ""))
+        timings["client"] = elapsed
+        samples.append(timings)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(bodies[i % len(bodies)]) for i in range(total)))
+    return samples, errors, time.perf_counter() - start
+
+
+def stage_percentiles(samples) -> dict:
+    stages = {}
+    for timings in samples:
+        for name, seconds in timings.items():
+            stages.setdefault(name, []).append(seconds)
+    return {
+        name: {"count": len(values), **{f"p{p}": float(np.percentile(values, p)) * 1000 for p in (50, 95, 99)}}
+        for name, values in stages.items()
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from app import api
+
+    with open(LABELLED_QUERIES, "r") as f:
+        labelled = json.load(f)
+    options = {key: value for key, value in (("mode", args.mode), ("rerank", args.rerank or None)) if value is not None}
+
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            response = await client.post("/recommend/batch", json={
+                "queries": [{"text": query["text"], "use_ai": False, **options} for query in labelled]
+            })
+            response.raise_for_status()
+            quality = relevance(response.json(), labelled, args.k)
+
+            bodies = [{"text": query["text"], "use_ai": args.use_ai, **options} for query in labelled]
+            samples, errors, elapsed = await replay(client, bodies, args.requests, args.concurrency)
+
+    return {
+        "config": {
+            "search_backend": api.SEARCH_BACKEND,
+            "embedding_runtime": os.getenv("EMBEDDING_RUNTIME", "torch"),
+            "search_mode": args.mode or api.SEARCH_MODE,
+            "rerank": args.rerank,
+            "use_ai": args.use_ai,
+            "cold": args.cold,
+            "concurrency": args.concurrency,
+            "requests": args.requests
+        },
+        "relevance": quality,
+        "throughput": len(samples) / elapsed,
+        "errors": errors,
+        "stages_ms": stage_percentiles(samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--use-ai", action="store_true")
+    parser.add_argument("--mode", choices=("semantic", "hybrid"))
+    parser.add_argument("--rerank", action="store_true")
+    parser.add_argument("--cold", action="store_true")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--per-item", type=float, default=0.1)
+    parser.add_argument("--min-recall", type=float, default=0.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    # Everything app.api reads at import time has to be set first
+    server = serve(latency=args.latency, per_item=args.per_item)
+    os.environ.update({
+        "COHERE_API_KEY": "stub",
+        "COHERE_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+        "INSIGHT_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "insights.sqlite3"),
+        "SERVER_TIMING": "true"
+    })
+    if args.cold:
+        os.environ["QUERY_CACHE_SIZE"] = "0"
+
+    report = asyncio.run(run(args))
+    report["llm_calls"] = server.llm.stats()["calls"]
+    server.shutdown()
+
+    print(" ".join(f"{key}={value}" for key, value in report["config"].items()))
+    print(f"📊 recall@{args.k} {report['relevance'][f'recall@{args.k}']:.3f}  MRR {report['relevance']['mrr']:.3f}")
+    print(f"🚀 {report['throughput']:.1f} requests/s, {report['errors']} errors, {report['llm_calls']} LLM calls")
+    print(f"{'stage':<12}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in report["stages_ms"].items():
+        print(f"{name:<12}{stats['count']:>7}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["errors"] or report["relevance"][f"recall@{args.k}"] < args.min_recall:
+        sys.exit(f"❌ {report['errors']} errors, recall@{args.k} below {args.min_recall}")
+
+
+if __name__ == "__main__":
+    main()
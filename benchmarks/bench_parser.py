@@ -0,0 +1,76 @@
+"""Golden check and timing for the assessment detail-page parser.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parser [--iterations 50]
+
+Every page in benchmarks/fixtures/assessment_pages/ is parsed with
+app.scraper.parse_assessment_page and compared with the fields recorded in
+assessment_pages_golden.json; any difference makes the script exit non-zero.
+The goldens were produced by the original html.parser implementation, so a
+pass means the fast parser extracts identical fields.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from app.scraper import DETAIL_DEFAULTS, parse_assessment_page
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures")
+PAGES_PATH = os.path.join(FIXTURES_PATH, "assessment_pages")
+GOLDEN_PATH = os.path.join(FIXTURES_PATH, "assessment_pages_golden.json")
+
+
+def load_pages():
+    pages = {}
+    for name in sorted(os.listdir(PAGES_PATH)):
+        with open(os.path.join(PAGES_PATH, name), "r") as f:
+            pages[name] = f.read()
+    return pages
+
+
+def check_golden(pages) -> bool:
+    with open(GOLDEN_PATH, "r") as f:
+        golden = json.load(f)
+
+    ok = True
+    for name, html in pages.items():
+        parsed = parse_assessment_page(html, dict(DETAIL_DEFAULTS))
+        if parsed != golden.get(name):
+            ok = False
+            print(f"❌ {name}: parsed fields differ from golden")
+            for field in sorted(set(parsed) | set(golden.get(name, {}))):
+                if parsed.get(field) != golden.get(name, {}).get(field):
+                    print(f"   {field}: {parsed.get(field)!r} != {golden.get(name, {}).get(field)!r}")
+    return ok
+
+
+def benchmark(pages, iterations: int):
+    print(f"{'page':<32}{'KiB':>8}{'ms/page':>10}")
+    total = 0.0
+    for name, html in pages.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parse_assessment_page(html, dict(DETAIL_DEFAULTS))
+        elapsed = (time.perf_counter() - start) / iterations
+        total += elapsed
+        print(f"{name:<32}{len(html) / 1024:>8.1f}{elapsed * 1000:>10.2f}")
+    print(f"{'mean':<32}{'':>8}{total / len(pages) * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = load_pages()
+    if not check_golden(pages):
+        sys.exit(1)
+    print(f"✅ {len(pages)} fixture pages match golden output\n")
+    benchmark(pages, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Import-time profile and time-to-ready for the API process.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [--top 15] [--ready]
+
+`import app.api` runs in a fresh interpreter under `-X importtime`, and the
+self time of every imported module is summed per top-level package. Heavy
+optional dependencies must stay deferred until the code path that needs them;
+if any of DEFERRED is loaded by the import alone, the script exits non-zero.
+With --ready it also starts uvicorn and reports how long /ready takes to
+answer 200. That covers the import, loading the embedding model and opening
+the index, with whatever SEARCH_BACKEND and EMBEDDING_RUNTIME are set.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+DEFERRED = (
+    "chromadb", "cohere", "bs4", "httpx", "requests",
+    "torch", "sentence_transformers", "onnxruntime", "tokenizers"
+)
+
+
+def import_profile():
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys, app.api; print(sorted(m for m in {DEFERRED!r} if m in sys.modules))"],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        print(completed.stderr)
+        sys.exit("❌ import app.api failed")
+
+    packages = defaultdict(int)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        packages[module.strip().split(".")[0]] += int(self_us)
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1].replace("'", '"'))
+    return packages, loaded
+
+
+def time_to_ready(timeout: float = 300.0) -> float:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                sys.exit("❌ uvicorn exited before becoming ready")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.05)
+        sys.exit(f"❌ /ready did not answer 200 within {timeout:.0f} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--ready", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    packages, loaded = import_profile()
+    wall = time.perf_counter() - start
+
+    total = sum(packages.values())
+    print(f"{'package':<28}{'ms':>10}{'share':>8}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<28}{self_us / 1000:>10.1f}{self_us / total:>8.1%}")
+    print(f"{'total (import app.api)':<28}{total / 1000:>10.1f}")
+    print(f"{'interpreter wall time':<28}{wall * 1000:>10.1f}")
+
+    if args.ready:
+        print(f"\n⏱️ /ready after {time_to_ready():.2f} s "
+              f"(SEARCH_BACKEND={os.getenv('SEARCH_BACKEND', 'chroma')}, "
+              f"EMBEDDING_RUNTIME={os.getenv('EMBEDDING_RUNTIME', 'torch')})")
+
+    if loaded:
+        sys.exit(f"❌ Loaded at import time but should be deferred: {', '.join(loaded)}")
+    print(f"\n✅ None of {', '.join(DEFERRED)} is imported by app.api")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Local stand-in for Cohere's generate endpoint.
+
+    python -m benchmarks.stub_llm [--port 8090] [--latency 0.5] [--per-item 0.1] [--drop-rate 0]
+
+Point the API at it with COHERE_API_KEY=stub and
+COHERE_BASE_URL=http://127.0.0.1:8090. Every POST whose path ends in
+/generate is answered after `latency + per_item * sections` seconds, which
+roughly models a fixed round-trip plus generation time. Batched prompts
+(numbered "[n] Description:" sections) get one numbered answer per section,
+and --drop-rate leaves sections out at random to exercise the per-item
+fallback. GET /stats returns the number of calls and prompts served.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECTION_PATTERN = re.compile(r"\[(\d+)\] Description:")
+ANSWER = "1. Key skills: {skills}\n2. Ideal candidate level: Mid-Professional\n3. Best use case: Screening before interviews"
+
+
+class StubLLM:
+    def __init__(self, latency: float = 0.5, per_item: float = 0.1, drop_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.per_item = per_item
+        self.drop_rate = drop_rate
+        self.calls = 0
+        self.prompts = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def answer(self, prompt: str) -> str:
+        sections = [int(number) for number in SECTION_PATTERN.findall(prompt)]
+        with self._lock:
+            self.calls += 1
+            self.prompts += max(len(sections), 1)
+            dropped = {number for number in sections if self._random.random() < self.drop_rate}
+        time.sleep(self.latency + self.per_item * max(len(sections), 1))
+
+        skills = " ".join(prompt.split()[-12:-9])  # Any text that varies with the prompt
+        if not sections:
+            return ANSWER.format(skills=skills)
+        return "\n\n".join(
+            f"[{number}]\n{ANSWER.format(skills=f'section {number}')}" for number in sections if number not in dropped
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "prompts": self.prompts}
+
+
+def make_handler(llm: StubLLM):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, payload: dict, status: int = 200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self.send_json(llm.stats())
+            else:
+                self.send_json({"message": "not found"}, 404)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/generate"):
+                self.send_json({"message": "not found"}, 404)
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = request.get("prompt", "")
+            self.send_json({
+                "id": str(uuid.uuid4()),
+                "prompt": prompt,
+                "generations": [{"id": str(uuid.uuid4()), "text": llm.answer(prompt), "finish_reason": "COMPLETE"}],
+                "meta": {"api_version": {"version": "1"}}
+            })
+
+    return Handler
+
+
+def serve(port: int = 0, **options) -> ThreadingHTTPServer:
+    """Start the stub on a background thread (port 0 picks a free one).
+
+    The StubLLM is available as ``server.llm``; call ``shutdown()`` to stop.
+    """
+    llm = StubLLM(**options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(llm))
+    server.llm = llm
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--per-item", type=float, default=0.1)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    llm = StubLLM(args.latency, args.per_item, args.drop_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(llm))
+    print(f"🤖 Stub LLM listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
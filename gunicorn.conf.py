@@ -0,0 +1,43 @@
+"""Multi-worker serving of the recommendation API.
+
+    gunicorn -c gunicorn.conf.py app.api:app
+
+Run `python -m app.rag` first: the numpy index served here is exported by
+the index build, and an index built before that export existed has none.
+
+The app is imported once in the gunicorn master, which then loads the
+embedding model (and the cross-encoder when RERANK is on) and opens the
+numpy index before forking. Workers share those pages copy-on-write. The
+embedding matrix and the similar-assessment table are memory-mapped and stay
+shared. The metadata table and BM25 postings are Python objects, so a page
+of them is copied into a worker once the worker touches it. Each worker still
+runs the FastAPI lifespan: warm-up encode, index pointer watcher, HTTP client.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+
+# The exported numpy index is loaded once in the master, so no worker opens
+# app/chroma_db (SQLite); it is missing until python -m app.rag has run
+os.environ.setdefault("SEARCH_BACKEND", "numpy")
+
+# Split the cores between workers rather than letting each worker's torch or
+# onnxruntime thread pool claim all of them. Read when those libraries load,
+# hence set here, before the app is imported.
+threads_per_worker = str(max(1, (os.cpu_count() or 1) // workers))
+os.environ.setdefault("OMP_NUM_THREADS", threads_per_worker)
+os.environ.setdefault("ONNX_THREADS", threads_per_worker)
+
+
+def on_starting(server):
+    from app.api import preload
+
+    preload()
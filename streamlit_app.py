@@ -69,7 +69,7 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("""
     **📊 Interpretation Guide**
-    - **Relevance Score**: Lower is better (0.0 = perfect match)
+    - **Relevance Score**: Higher is better (1.0 = perfect match)
     - **Support Icons**: 
       - 🟢 = Supported 
       - 🔴 = Not Supported 
@@ -82,81 +82,117 @@ query = st.text_input(
     placeholder="e.g. 'Mid-level account manager with client experience'"
 )
 
-if st.button("Find Assessments", type="primary") and query:
-    with st.spinner("🔍 Finding optimal assessments..."):
-        try:
-            response = requests.post(
-                api_url,
-                json={"text": query, "use_ai": use_ai},
-                timeout=120
-            ).json()
+def render_insights(placeholder, ai_insights):
+    with placeholder.container():
+        st.markdown('<div class="ai-insights">', unsafe_allow_html=True)
+        st.markdown("**🤖 AI Analysis:**")
+        for line in ai_insights.split('\n'):
+            if line.strip():
+                st.markdown(f"• {line.strip()}")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+def render_card(item):
+    """Draw one assessment card; returns the placeholder its AI insights go into."""
+    # Safely handle all fields with defaults
+    name = item.get('name', 'Unknown Assessment')
+    url = item.get('url', '#')
+    score = item.get('score', 0.0)
+    duration = item.get('duration', 'Not specified')
+    languages = ''.join(item.get('languages', [])) or 'Not specified'
+    job_level = item.get('job_level', 'Not specified')
+    remote_testing = item.get('remote_testing', '❓')
+    adaptive_support = item.get('adaptive_support', item.get('adaptive/irt_support', '❓'))
+    test_type = item.get('test_type', 'Not specified')
+    description = item.get('description', 'No description available')
+
+    # Create assessment card using Streamlit components
+    with st.container():
+        st.markdown('<div class="assessment-card">', unsafe_allow_html=True)
+        
+        # Header row
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.subheader(name)
+        with col2:
+            st.markdown(f'<span class="relevance-badge">Relevance: {score:.3f}</span>', 
+                      unsafe_allow_html=True)
+        
+        # Details using columns for layout
+        def detail_row(label, value):
+            cols = st.columns([1, 3])
+            with cols[0]:
+                st.markdown(f'<div class="detail-label">{label}</div>', unsafe_allow_html=True)
+            with cols[1]:
+                st.markdown(f'<div class="detail-value">{value}</div>', unsafe_allow_html=True)
+        
+        detail_row("🔗 URL:", f'<a href="{url}" target="_blank">View Assessment</a>')
+        detail_row("⏱ Duration:", duration)
+        detail_row("🗣 Languages:", languages)
+        detail_row("📊 Job Level:", job_level)
+        detail_row("🏠 Remote Testing:", f'<span class="support-icon">{remote_testing}</span>')
+        detail_row("🔄 Adaptive/IRT:", f'<span class="support-icon">{adaptive_support}</span>')
+        detail_row("🧪 Test Type:", test_type)
+        
+        # Description
+        st.markdown("---")
+        st.markdown("**Description:**")
+        st.markdown(description)
+        
+        # AI Insights are filled in as they arrive
+        insights_placeholder = st.empty()
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    return insights_placeholder
 
-            if not response:
-                st.warning("No assessments found. Try different keywords.")
-            else:
-                st.success(f"🎉 Found {len(response)} matching assessments")
-                
-                for item in sorted(response, key=lambda x: x['score']):
-                    # Safely handle all fields with defaults
-                    name = item.get('name', 'Unknown Assessment')
-                    url = item.get('url', '#')
-                    score = item.get('score', 1.0)
-                    duration = item.get('duration', 'Not specified')
-                    languages = ''.join(item.get('languages', [])) or 'Not specified'
-                    job_level = item.get('job_level', 'Not specified')
-                    remote_testing = item.get('remote_testing', '❓')
-                    adaptive_support = item.get('adaptive_support', item.get('adaptive/irt_support', '❓'))
-                    test_type = item.get('test_type', 'Not specified')
-                    description = item.get('description', 'No description available')
-                    ai_insights = item.get('ai_insights', '') if use_ai else ''
+def stream_recommendations(api_url, query, use_ai):
+    """Yield events from /recommend/stream; falls back to /recommend on older APIs."""
+    with requests.post(
+        f"{api_url.rstrip('/')}/stream",
+        json={"text": query, "use_ai": use_ai},
+        stream=True,
+        timeout=120
+    ) as response:
+        if response.status_code != 404:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+            return
+
+    recommendations = requests.post(api_url, json={"text": query, "use_ai": use_ai}, timeout=120).json()
+    yield {"event": "results", "recommendations": recommendations}
+    for index, item in enumerate(recommendations):
+        if item.get('ai_insights'):
+            yield {"event": "insight", "index": index, "ai_insights": item['ai_insights']}
+    yield {"event": "done"}
+
+if st.button("Find Assessments", type="primary") and query:
+    status = st.empty()
+    status.info("🔍 Finding optimal assessments...")
+    try:
+        placeholders = {}
+        for event in stream_recommendations(api_url, query, use_ai):
+            if event["event"] == "results":
+                response = event["recommendations"]
+                if not response:
+                    status.warning("No assessments found. Try different keywords.")
+                    break
+                status.success(f"🎉 Found {len(response)} matching assessments"
+                               + (" – AI insights on the way…" if use_ai else ""))
+                # Cards render as soon as the ranking arrives; indices refer to
+                # the API's order, so keep them across the display sort
+                for index in sorted(range(len(response)), key=lambda i: response[i]['score'], reverse=True):
+                    placeholders[index] = render_card(response[index])
+                    if use_ai:
+                        placeholders[index].caption("⏳ Generating AI insights…")
+            elif event["event"] == "insight" and event["index"] in placeholders:
+                render_insights(placeholders[event["index"]], event["ai_insights"])
+            elif event["event"] == "done" and placeholders:
+                status.success(f"🎉 Found {len(placeholders)} matching assessments")
                     
-                    # Create assessment card using Streamlit components
-                    with st.container():
-                        st.markdown('<div class="assessment-card">', unsafe_allow_html=True)
-                        
-                        # Header row
-                        col1, col2 = st.columns([4, 1])
-                        with col1:
-                            st.subheader(name)
-                        with col2:
-                            st.markdown(f'<span class="relevance-badge">Relevance: {score:.3f}</span>', 
-                                      unsafe_allow_html=True)
-                        
-                        # Details using columns for layout
-                        def detail_row(label, value):
-                            cols = st.columns([1, 3])
-                            with cols[0]:
-                                st.markdown(f'<div class="detail-label">{label}</div>', unsafe_allow_html=True)
-                            with cols[1]:
-                                st.markdown(f'<div class="detail-value">{value}</div>', unsafe_allow_html=True)
-                        
-                        detail_row("🔗 URL:", f'<a href="{url}" target="_blank">View Assessment</a>')
-                        detail_row("⏱ Duration:", duration)
-                        detail_row("🗣 Languages:", languages)
-                        detail_row("📊 Job Level:", job_level)
-                        detail_row("🏠 Remote Testing:", f'<span class="support-icon">{remote_testing}</span>')
-                        detail_row("🔄 Adaptive/IRT:", f'<span class="support-icon">{adaptive_support}</span>')
-                        detail_row("🧪 Test Type:", test_type)
-                        
-                        # Description
-                        st.markdown("---")
-                        st.markdown("**Description:**")
-                        st.markdown(description)
-                        
-                        # AI Insights
-                        if ai_insights:
-                            st.markdown('<div class="ai-insights">', unsafe_allow_html=True)
-                            st.markdown("**🤖 AI Analysis:**")
-                            for line in ai_insights.split('\n'):
-                                if line.strip():
-                                    st.markdown(f"• {line.strip()}")
-                            st.markdown('</div>', unsafe_allow_html=True)
-                        
-                        st.markdown('</div>', unsafe_allow_html=True)
-                        
-        except Exception as e:
-            st.error(f"⚠️ Error: {str(e)}")
-            st.info("Please ensure the API is running at the specified endpoint")
+    except Exception as e:
+        st.error(f"⚠️ Error: {str(e)}")
+        st.info("Please ensure the API is running at the specified endpoint")
 
 # Footer
 st.markdown("---")
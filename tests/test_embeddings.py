@@ -0,0 +1,48 @@
+"""int8 ONNX vs float sentence-transformers parity, see benchmarks/bench_embeddings.py.
+
+Needs both runtimes and the exported model (`python -m app.onnx_embedding`);
+otherwise the test is skipped.
+"""
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+
+from app.onnx_embedding import ONNX_MODEL_DIR, ONNX_MODEL_FILE, OnnxEmbeddingFunction
+from app.rag import ChromaEmbeddingFunction
+from benchmarks.bench_embeddings import QUERIES, load_catalog, rank
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+K = 10
+MIN_OVERLAP = 0.9
+
+
+@pytest.fixture(scope="module")
+def rankings():
+    if not os.path.exists(os.path.join(ROOT, ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+        pytest.skip("ONNX model not exported, run python -m app.onnx_embedding")
+
+    cwd = os.getcwd()
+    os.chdir(ROOT)  # Model and catalog paths are relative to the repository root
+    try:
+        documents, chunk_counts = load_catalog()
+        ranked = {}
+        for runtime, embedding_function in (("torch", ChromaEmbeddingFunction()), ("onnx", OnnxEmbeddingFunction())):
+            document_embeddings = np.asarray(embedding_function(documents), dtype=np.float32)
+            query_embeddings = np.asarray(embedding_function(QUERIES), dtype=np.float32)
+            ranked[runtime] = rank(query_embeddings, document_embeddings, chunk_counts, K)
+    finally:
+        os.chdir(cwd)
+    return ranked
+
+
+def test_onnx_rankings_match_torch(rankings):
+    overlaps = [
+        len(set(torch_top) & set(onnx_top)) / K
+        for torch_top, onnx_top in zip(rankings["torch"], rankings["onnx"])
+    ]
+    assert np.mean(overlaps) >= MIN_OVERLAP
@@ -0,0 +1,68 @@
+"""Typed metadata and where-clauses over real catalog values."""
+import pytest
+
+from app.filters import UNKNOWN_DURATION, SearchFilters, build_where, matches, parse_duration_minutes, typed_metadata
+
+PREFIX = "Approximate Completion Time in minutes = "
+
+
+def item(**fields) -> dict:
+    return {
+        "duration": f"{PREFIX}30",
+        "languages": ["English (USA)"],
+        "job_level": "Graduate, Mid-Professional,",
+        "remote_testing": "🟢",
+        "adaptive/irt_support": "🔴",
+        "test_type": "K",
+        **fields
+    }
+
+
+def admitted(filters: SearchFilters, **fields) -> bool:
+    return matches(typed_metadata(item(**fields)), build_where(filters))
+
+
+@pytest.mark.parametrize("duration, minutes", [
+    (f"{PREFIX}49", 49),
+    (f"{PREFIX}7 minutes", 7),
+    (f"{PREFIX}max 20", 20),
+    (f"{PREFIX}15 to 35", 35),
+    (f"{PREFIX}Untimed, approx. 25", UNKNOWN_DURATION),
+    (f"{PREFIX}Untimed", UNKNOWN_DURATION),
+    (f"{PREFIX}Variable", UNKNOWN_DURATION),
+    (f"{PREFIX}TBC", UNKNOWN_DURATION),
+    (f"{PREFIX}-", UNKNOWN_DURATION),
+    ("Duration not specified", UNKNOWN_DURATION),
+])
+def test_parse_duration_minutes(duration, minutes):
+    assert parse_duration_minutes(duration) == minutes
+
+
+def test_max_duration_uses_the_upper_bound_of_a_range():
+    assert not admitted(SearchFilters(max_duration=20), duration=f"{PREFIX}15 to 35")
+    assert admitted(SearchFilters(max_duration=35), duration=f"{PREFIX}15 to 35")
+
+
+def test_max_duration_skips_unknown_durations():
+    for duration in (f"{PREFIX}Untimed, approx. 25", f"{PREFIX}Variable", "Duration not specified"):
+        assert not admitted(SearchFilters(max_duration=60), duration=duration)
+
+
+def test_list_filters_match_any_value():
+    filters = SearchFilters(job_levels=["Director", "Graduate"], test_types=["P", "K"], languages=["English (USA)"])
+    assert admitted(filters)
+    assert admitted(filters, test_type="CPAB")
+    assert not admitted(filters, test_type="Not found")
+    assert not admitted(filters, job_level="Level not specified")
+
+
+def test_flags_and_combined_filters():
+    assert admitted(SearchFilters(remote_testing=True, adaptive=False, max_duration=30))
+    assert not admitted(SearchFilters(adaptive=True))
+    assert not admitted(SearchFilters(remote_testing=True, max_duration=29))
+
+
+def test_empty_filters_match_everything():
+    assert build_where(None) is None
+    assert build_where(SearchFilters()) is None
+    assert matches({}, None)
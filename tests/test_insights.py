@@ -0,0 +1,119 @@
+"""Insight generation and caching, with the stub LLM standing in for Cohere."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app import insights
+from app.cache import DiskCache
+from benchmarks.stub_llm import StubLLM
+
+DESCRIPTIONS = [f"Assessment {i} measures numerical reasoning for graduate roles." for i in range(5)]
+
+
+class CountingClient:
+    """In-process stand-in for cohere.Client that answers like benchmarks/stub_llm.py."""
+
+    def __init__(self):
+        self.llm = StubLLM(latency=0, per_item=0)
+        self.prompts = []
+
+    def generate(self, model, prompt, max_tokens, temperature):
+        self.prompts.append(prompt)
+        return SimpleNamespace(generations=[SimpleNamespace(text=self.llm.answer(prompt))])
+
+
+@pytest.fixture(autouse=True)
+def insight_cache(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "insights.sqlite3"))
+    monkeypatch.setattr(insights, "insight_cache", cache)
+    return cache
+
+
+def use_client(monkeypatch, client):
+    monkeypatch.setitem(insights.cohere_state, "client", client)
+    monkeypatch.setitem(insights.cohere_state, "loaded", True)
+    return client
+
+
+def test_warmed_cache_serves_batched_requests(tmp_path, monkeypatch):
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps([{"name": f"A{i}", "description": d} for i, d in enumerate(DESCRIPTIONS)]))
+    client = use_client(monkeypatch, CountingClient())
+    monkeypatch.setattr(insights, "INSIGHT_MODE", "batched")
+
+    insights.warm_insight_cache(str(catalog_path))
+    warmed = [insights.generate_cohere_insights(description) for description in DESCRIPTIONS]
+    assert len(client.prompts) == len(DESCRIPTIONS)
+
+    client.prompts.clear()
+    assert asyncio.run(insights.gather_insights(DESCRIPTIONS)) == warmed
+    assert client.prompts == []
+
+
+class FailingClient(CountingClient):
+    def generate(self, model, prompt, max_tokens, temperature):
+        self.prompts.append(prompt)
+        raise RuntimeError("429 Too Many Requests")
+
+
+def test_failed_batch_call_is_not_retried_per_item(monkeypatch, insight_cache):
+    client = use_client(monkeypatch, FailingClient())
+    monkeypatch.setattr(insights, "INSIGHT_MODE", "batched")
+
+    assert asyncio.run(insights.gather_insights(DESCRIPTIONS)) == ["AI insights unavailable"] * len(DESCRIPTIONS)
+    assert len(client.prompts) == 1
+    assert len(insight_cache) == 0  # Failures are retried by the next request
+
+
+def test_parse_batch_insights_leaves_missing_sections_empty():
+    text = "[1]\nfirst\n\n[3] Description:\nthird\n[3]\nduplicate\n[4]\nout of range\n[2]\n"
+    assert insights.parse_batch_insights(text, 3) == ["first", None, "third"]
+    assert insights.parse_batch_insights("no numbered sections", 2) == [None, None]
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """benchmarks/stub_llm.py dropping about a third of each batched answer, reached through the Cohere SDK."""
+    pytest.importorskip("cohere")
+    from benchmarks.stub_llm import serve
+
+    server = serve(latency=0, per_item=0, drop_rate=0.3, seed=1)
+    monkeypatch.setenv("COHERE_API_KEY", "stub")
+    monkeypatch.setenv("COHERE_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setitem(insights.cohere_state, "client", None)
+    monkeypatch.setitem(insights.cohere_state, "loaded", False)
+    monkeypatch.setattr(insights, "INSIGHT_MODE", "batched")
+    monkeypatch.setattr(insights, "INSIGHT_BATCH_SIZE", 10)
+    yield server.llm
+    server.shutdown()
+
+
+def test_dropped_sections_are_retried_alone(stub_llm, insight_cache):
+    descriptions = [f"Assessment {i} measures verbal reasoning for sales roles." for i in range(10)]
+    answers = asyncio.run(insights.gather_insights(descriptions))
+
+    # Batched answers name their section; the stub answers single prompts with prompt text
+    retried = [i for i, answer in enumerate(answers) if "section" not in answer]
+    assert retried and len(retried) < len(descriptions)
+    assert insights.INSIGHT_PLACEHOLDER not in answers
+    assert stub_llm.stats() == {"calls": 1 + len(retried), "prompts": len(descriptions) + len(retried)}
+
+    # Batched answers are cached under the batch prompt version, retries under the single one
+    for i, description in enumerate(descriptions):
+        assert (insights.insight_cache_key(description) in insight_cache) == (i in retried)
+        assert (insights.insight_cache_key(description, insights.BATCH_PROMPT_VERSION) in insight_cache) != (i in retried)
+
+    assert asyncio.run(insights.gather_insights(descriptions)) == answers
+    assert stub_llm.stats()["calls"] == 1 + len(retried)
+
+
+def test_single_prompts_never_reuse_batched_answers(stub_llm):
+    descriptions = [f"Assessment {i} measures coding skill in Java." for i in range(3)]
+    batched = asyncio.run(insights.gather_insights(descriptions))
+    calls = stub_llm.stats()["calls"]
+
+    i = next(i for i, answer in enumerate(batched) if "section" in answer)
+    assert insights.generate_cohere_insights(descriptions[i]) != batched[i]
+    assert stub_llm.stats()["calls"] == calls + 1
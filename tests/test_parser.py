@@ -0,0 +1,28 @@
+"""Golden output of the assessment detail-page parser, see benchmarks/bench_parser.py."""
+import json
+import os
+
+import pytest
+
+from app.scraper import DETAIL_DEFAULTS, parse_assessment_page
+from benchmarks.bench_parser import GOLDEN_PATH, PAGES_PATH
+
+with open(GOLDEN_PATH, "r") as f:
+    GOLDEN = json.load(f)
+
+
+def test_every_fixture_page_has_a_golden():
+    assert sorted(os.listdir(PAGES_PATH)) == sorted(GOLDEN)
+
+
+@pytest.mark.parametrize("page", sorted(GOLDEN))
+def test_parse_assessment_page_matches_golden(page):
+    with open(os.path.join(PAGES_PATH, page), "r") as f:
+        html = f.read()
+    assert parse_assessment_page(html, dict(DETAIL_DEFAULTS)) == GOLDEN[page]
+
+
+def test_parse_assessment_page_fills_the_given_dict():
+    defaults = dict(DETAIL_DEFAULTS)
+    with open(os.path.join(PAGES_PATH, "knowledge_test.html"), "r") as f:
+        assert parse_assessment_page(f.read(), defaults) is defaults
@@ -0,0 +1,141 @@
+"""End-to-end crawl against a local fixture server standing in for shl.com."""
+import http.server
+import json
+import os
+import threading
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.scraper import CATALOG_URLS, Checkpoint, scrape_shl_catalog
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures")
+PAGES_PATH = os.path.join(FIXTURES_PATH, "assessment_pages")
+GOLDEN_PATH = os.path.join(FIXTURES_PATH, "assessment_pages_golden.json")
+DETAIL_PREFIX = "/solutions/products/product-catalog/view/"
+# Served without an ETag, so the second crawl falls back to comparing body hashes
+NO_ETAG_PAGE = "no_headings"
+
+
+class CatalogHandler(http.server.BaseHTTPRequestHandler):
+    """The first tab lists every fixture page, the second one a page that 503s once."""
+
+    pages = {}
+    hits = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        with self.lock:
+            self.hits[self.path] = self.hits.get(self.path, 0) + 1
+            hits = self.hits[self.path]
+
+        if url.path.startswith(DETAIL_PREFIX):
+            slug = url.path[len(DETAIL_PREFIX):].strip("/")
+            if slug == "flaky" and hits == 1:
+                return self.respond(503, b"")
+            body = self.pages.get(slug, self.pages["knowledge_test"])
+        else:
+            start = int(parse_qs(url.query).get("start", ["0"])[0])
+            names = sorted(self.pages) if start == 0 else ["flaky"] if start == 12 else []
+            rows = "".join(
+                f'<tr><td><a href="{DETAIL_PREFIX}{name}/">{name}</a></td><td></td>'
+                f'<td><span class="catalogue__circle -yes"></span></td></tr>'
+                for name in names
+            )
+            body = f"<table><tr><th>Name</th></tr>{rows}</table>"
+
+        etag = None if NO_ETAG_PAGE in url.path else f'"{hash(body):x}"'
+        if etag and self.headers.get("If-None-Match") == etag:
+            return self.respond(304, b"")
+        self.respond(200, body.encode("utf-8"), etag)
+
+    def respond(self, status: int, body: bytes, etag: str = None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def catalog_server():
+    pages = {}
+    for name in os.listdir(PAGES_PATH):
+        with open(os.path.join(PAGES_PATH, name), "r") as f:
+            pages[os.path.splitext(name)[0]] = f.read()
+    handler = type("Handler", (CatalogHandler,), {"pages": pages, "hits": {}})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield SimpleNamespace(url=f"http://127.0.0.1:{server.server_port}", hits=handler.hits)
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(base_url: str, tmp_path, resume: bool = False, http_cache: bool = True) -> list:
+    return scrape_shl_catalog(
+        base_url=base_url,
+        output_path=str(tmp_path / "assessments.json"),
+        checkpoint_path=str(tmp_path / "checkpoint.jsonl"),
+        http_cache_path=str(tmp_path / "http_cache.sqlite3") if http_cache else None,
+        min_interval=0,
+        resume=resume
+    )
+
+
+def test_crawl_parses_every_fixture_page(catalog_server, tmp_path):
+    with open(GOLDEN_PATH, "r") as f:
+        golden = json.load(f)
+
+    assessments = crawl(catalog_server.url, tmp_path)
+
+    by_name = {item["name"]: item for item in assessments}
+    assert sorted(by_name) == sorted([os.path.splitext(name)[0] for name in golden] + ["flaky"])
+    for page, fields in golden.items():
+        item = by_name[os.path.splitext(page)[0]]
+        assert item["url"] == f"{catalog_server.url}{DETAIL_PREFIX}{item['name']}/"
+        assert item["source_tab"] == 1
+        assert {field: item[field] for field in fields} == fields
+    # The 503 is retried by the session rather than stored as an error page
+    assert by_name["flaky"]["source_tab"] == 2
+    assert "Error" not in by_name["flaky"]["description"]
+
+    with open(tmp_path / "assessments.json", "r") as f:
+        assert json.load(f) == assessments
+    assert not os.path.exists(tmp_path / "checkpoint.jsonl")
+
+
+def test_recrawl_reuses_cached_pages(catalog_server, tmp_path, capsys):
+    first = crawl(catalog_server.url, tmp_path)
+    capsys.readouterr()
+
+    assert crawl(catalog_server.url, tmp_path) == first
+    pages = len(CATALOG_URLS) + len(first)
+    assert f"Pages: 0 parsed, 1 unchanged, {pages - 1} not modified (304)" in capsys.readouterr().out
+
+
+def test_resumed_crawl_skips_checkpointed_urls(catalog_server, tmp_path, monkeypatch):
+    # Keep the checkpoint of a full crawl, then cut it short as a crash would
+    with monkeypatch.context() as patch:
+        patch.setattr(Checkpoint, "clear", lambda self: None)
+        first = crawl(catalog_server.url, tmp_path, http_cache=False)
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+    lines = checkpoint_path.read_text().splitlines(keepends=True)
+    kept = lines[:len(lines) // 2]
+    checkpoint_path.write_text("".join(kept) + lines[len(kept)][:20])  # Torn last line
+    done = {json.loads(line)["url"] for line in kept}
+    hits_before = dict(catalog_server.hits)
+
+    # No HTTP cache, so every URL not in the checkpoint must be fetched again
+    assert crawl(catalog_server.url, tmp_path, resume=True, http_cache=False) == first
+    fetched = {
+        path for path, count in catalog_server.hits.items() if count > hits_before.get(path, 0)
+    }
+    assert {f"{catalog_server.url}{path}" for path in fetched}.isdisjoint(done)
+    assert len(fetched) == len(lines) - len(kept)
+    assert not checkpoint_path.exists()